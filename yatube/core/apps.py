@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import autodiscover_modules
+
+from .databases import configure_sqlite
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='core.configure_sqlite'
+        )
+        autodiscover_modules('tasks')
@@ -0,0 +1,21 @@
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+
+class ThreadedWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # В asgiref run_wsgi_app обёрнут в sync_to_async с thread_sensitive
+    # по умолчанию, и все запросы шли бы по очереди в одном потоке.
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+        thread_sensitive=False,
+    )
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi, который выполняет запросы параллельно в пуле потоков."""
+
+    async def __call__(self, scope, receive, send):
+        instance = ThreadedWsgiToAsgiInstance(
+            self.wsgi_application, self.duplicate_header_limit
+        )
+        await instance(scope, receive, send)
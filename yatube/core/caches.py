@@ -0,0 +1,38 @@
+import importlib.util
+from urllib.parse import urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+REDIS_BACKEND = 'django_redis.cache.RedisCache'
+
+
+def cache_from_url(url, **options):
+    """Настройки кеша Django по адресу из переменной окружения.
+
+    ``locmem://[имя]`` — память процесса, ``file:///путь`` — общий для
+    всех воркеров каталог, ``redis://`` и ``rediss://`` — сервер
+    с протоколом Redis через необязательный пакет django-redis.
+    """
+    parts = urlsplit(url)
+    if parts.scheme == 'locmem':
+        config = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': parts.netloc,
+        }
+    elif parts.scheme == 'file':
+        if not parts.path:
+            raise ImproperlyConfigured(f'В адресе кеша {url} нет каталога.')
+        config = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': parts.path,
+        }
+    elif parts.scheme in ('redis', 'rediss'):
+        if importlib.util.find_spec('django_redis') is None:
+            raise ImproperlyConfigured(
+                'Для кеша redis:// нужен пакет django-redis.'
+            )
+        config = {'BACKEND': REDIS_BACKEND, 'LOCATION': url}
+    else:
+        raise ImproperlyConfigured(f'Неизвестная схема адреса кеша: {url}')
+    config.update(options)
+    return config
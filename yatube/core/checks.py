@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def task_queue_cache(app_configs, **kwargs):
+    """Очередь задач требует общего кеша для версий лент.
+
+    Задачи сбрасывают кеш лент в процессе run_worker: с кешем в памяти
+    процесса веб-воркеры этого не увидят.
+    """
+    backend = settings.CACHES.get('posts', {}).get('BACKEND')
+    if settings.TASKS_EAGER or backend != LOCMEM_BACKEND:
+        return []
+    return [Error(
+        'Очередь задач (YATUBE_TASKS_EAGER=0) не работает с кешем '
+        'locmem://: воркер сбрасывает версии лент в своём процессе.',
+        hint='Укажите общий кеш в YATUBE_CACHE_URL (file:// или redis://).',
+        id='core.E001',
+    )]
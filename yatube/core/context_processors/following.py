@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.cache import get_following_ids
+
+
+def following(request):
+    """``following_ids`` — id авторов, на которых подписан пользователь.
+
+    Набор читается из кеша только если шаблон к нему обратился:
+    ``{% if author.pk in following_ids %}``.
+    """
+    return {
+        'following_ids': SimpleLazyObject(
+            lambda: get_following_ids(request.user)
+        ),
+    }
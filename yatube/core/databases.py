@@ -0,0 +1,58 @@
+import importlib.util
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+POSTGRES_ENGINE = 'django.db.backends.postgresql'
+
+
+def database_from_url(url, **options):
+    """Настройки базы данных Django по адресу из переменной окружения.
+
+    ``sqlite:///путь`` — файл SQLite, ``postgres://`` и ``postgresql://``
+    — сервер PostgreSQL, ``pgbouncer://`` — тот же сервер за PgBouncer
+    в режиме пула транзакций, где серверные курсоры не переживают
+    транзакцию. Параметры строки запроса попадают в OPTIONS.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if parts.scheme == 'sqlite':
+        if not parts.path:
+            raise ImproperlyConfigured(f'В адресе базы {url} нет файла.')
+        config = {'ENGINE': SQLITE_ENGINE, 'NAME': parts.path}
+    elif parts.scheme in ('postgres', 'postgresql', 'pgbouncer'):
+        if importlib.util.find_spec('psycopg2') is None:
+            raise ImproperlyConfigured(
+                'Для базы PostgreSQL нужен пакет psycopg2.'
+            )
+        config = {
+            'ENGINE': POSTGRES_ENGINE,
+            'NAME': unquote(parts.path.lstrip('/')),
+            'USER': unquote(parts.username or ''),
+            'PASSWORD': unquote(parts.password or ''),
+            'HOST': parts.hostname or '',
+            'PORT': str(parts.port or ''),
+        }
+        if parts.scheme == 'pgbouncer':
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    else:
+        raise ImproperlyConfigured(f'Неизвестная схема адреса базы: {url}')
+    if query:
+        config['OPTIONS'] = query
+    config.update(options)
+    return config
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Включает SQLITE_PRAGMAS на каждом новом соединении с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, settings.SQLITE_PRAGMAS)
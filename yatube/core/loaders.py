@@ -0,0 +1,81 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import metrics
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.LOADER_THREADS, thread_name_prefix='loader'
+            )
+    return _executor
+
+
+def can_run_parallel():
+    # Соединения других потоков не видят незакоммиченных данных, поэтому
+    # внутри transaction.atomic (и в TestCase) загрузки идут по очереди.
+    return settings.LOADER_THREADS > 1 and not any(
+        connections[alias].in_atomic_block for alias in connections
+    )
+
+
+def _run(loader, timings):
+    # Как на границах запроса: закрыть устаревшие и сломанные соединения
+    # потока пула до и после работы, живые переиспользуются по
+    # CONN_MAX_AGE.
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            if timings is not None:
+                stack.enter_context(metrics.attach(timings))
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        metrics.timed_execute
+                    ))
+            started = perf_counter()
+            return loader(), perf_counter() - started
+    finally:
+        close_old_connections()
+
+
+def load(**loaders):
+    """Выполняет независимые загрузки и возвращает результаты по именам.
+
+    Загрузки — функции без аргументов; они идут в пуле из LOADER_THREADS
+    потоков с копией контекста (маршрутизация по репликам сохраняется),
+    а их запросы засчитываются в замеры текущего запроса. Выигрыш —
+    сумма длительностей минус общее время — попадает в Server-Timing.
+    Первая ошибка пробрасывается, когда завершатся все загрузки.
+    """
+    if len(loaders) < 2 or not can_run_parallel():
+        return {name: loader() for name, loader in loaders.items()}
+    timings = metrics.current_timings()
+    executor = get_executor()
+    started = perf_counter()
+    futures = {
+        name: executor.submit(
+            contextvars.copy_context().run, _run, loader, timings
+        )
+        for name, loader in loaders.items()
+    }
+    wait(futures.values())
+    elapsed = perf_counter() - started
+    results = {}
+    total = 0.0
+    for name, future in futures.items():
+        results[name], duration = future.result()
+        total += duration
+    metrics.record_parallel_saved(max(total - elapsed, 0.0))
+    return results
@@ -0,0 +1,102 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import percentile
+
+DEFAULT_PATHS = ('/',)
+
+
+def fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+    except (URLError, OSError):
+        return None
+    return time.perf_counter() - started
+
+
+def run(urls, concurrency, requests, timeout=30):
+    """Отправляет запросы по кругу ``urls`` в ``concurrency`` потоков."""
+    targets = [urls[i % len(urls)] for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        durations = list(pool.map(lambda url: fetch(url, timeout), targets))
+    elapsed = time.perf_counter() - started
+    succeeded = [duration for duration in durations if duration is not None]
+    result = {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': requests - len(succeeded),
+        'requests_per_second': round(len(succeeded) / elapsed, 1),
+    }
+    if succeeded:
+        result['p50_ms'] = round(percentile(succeeded, 50) * 1000, 1)
+        result['p95_ms'] = round(percentile(succeeded, 95) * 1000, 1)
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер параллельными запросами, чтобы '
+        'сравнить WSGI (gunicorn yatube.wsgi) и ASGI (uvicorn yatube.asgi) '
+        'при разной конкурентности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'base_url', help='Адрес сервера, например http://127.0.0.1:8000'
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Страница для запросов; можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, action='append',
+            help='Число одновременных клиентов; можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый уровень конкурентности.'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Таймаут одного запроса в секундах.'
+        )
+        parser.add_argument(
+            '--output', help='Куда сохранить отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        levels = options['concurrency'] or [1, 10, 50]
+        if min(levels) < 1 or options['requests'] < 1:
+            raise CommandError(
+                'Конкурентность и число запросов должны быть положительными.'
+            )
+        urls = [
+            urljoin(options['base_url'], path)
+            for path in options['paths'] or DEFAULT_PATHS
+        ]
+        report = []
+        for level in levels:
+            result = run(urls, level, options['requests'], options['timeout'])
+            report.append(result)
+            self.stdout.write(
+                f'{level:>4} клиентов  '
+                f'{result["requests_per_second"]:>8} req/s  '
+                f'p50 {result.get("p50_ms", "-"):>8} ms  '
+                f'p95 {result.get("p95_ms", "-"):>8} ms  '
+                f'ошибок: {result["errors"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт сохранён в {options["output"]}'
+            ))
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.databases import apply_sqlite_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, pub_date REAL NOT NULL)'
+)
+READ_SQL = 'SELECT id, text FROM post ORDER BY pub_date DESC, id DESC LIMIT 10'
+WRITE_SQL = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+
+
+def prepare(path, rows):
+    with sqlite3.connect(path) as db:
+        db.execute(SCHEMA)
+        db.execute('CREATE INDEX post_pub_date ON post (pub_date)')
+        db.executemany(
+            WRITE_SQL,
+            ((i % 50, f'Пост {i}', time.time()) for i in range(rows)),
+        )
+    db.close()
+
+
+def worker(path, pragmas, kind, deadline, results):
+    # Как у Django: таймаут модуля sqlite3 по умолчанию — 5 секунд.
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if pragmas:
+        apply_sqlite_pragmas(db.cursor(), pragmas)
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            if kind == 'read':
+                db.execute(READ_SQL).fetchall()
+                db.execute('SELECT COUNT(*) FROM post').fetchone()
+            else:
+                db.execute('BEGIN IMMEDIATE')
+                db.execute(WRITE_SQL, (1, 'Новый пост', time.time()))
+                db.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            errors += 1
+    db.close()
+    results.append((kind, done, errors))
+
+
+def run(pragmas, readers, writers, seconds, rows):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'benchmark.sqlite3')
+    try:
+        prepare(path, rows)
+        results = []
+        deadline = time.perf_counter() + seconds
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(path, pragmas, kind, deadline, results),
+            )
+            for kind in ['read'] * readers + ['write'] * writers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    report = {}
+    for kind in ('read', 'write'):
+        done = sum(result[1] for result in results if result[0] == kind)
+        errors = sum(result[2] for result in results if result[0] == kind)
+        report[kind] = {
+            'operations': done,
+            'per_second': round(done / seconds, 1),
+            'errors': errors,
+        }
+    return report
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность одновременных чтений и записей '
+        'в SQLite с настройками по умолчанию и с SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4, help='Потоков чтения.'
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2, help='Потоков записи.'
+        )
+        parser.add_argument(
+            '--seconds', type=float, default=5.0,
+            help='Длительность каждого прогона.'
+        )
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help='Сколько постов создать перед прогоном.'
+        )
+        parser.add_argument(
+            '--output', help='Куда сохранить отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0:
+            raise CommandError('Число потоков не может быть отрицательным.')
+        if options['readers'] + options['writers'] < 1:
+            raise CommandError('Нужен хотя бы один поток.')
+        if options['seconds'] <= 0:
+            raise CommandError('--seconds должен быть положительным.')
+        report = {}
+        for name, pragmas in (('default', {}),
+                              ('tuned', settings.SQLITE_PRAGMAS)):
+            report[name] = run(
+                pragmas, options['readers'], options['writers'],
+                options['seconds'], options['rows'],
+            )
+            for kind, result in report[name].items():
+                self.stdout.write(
+                    f'{name:<8} {kind:<6} {result["per_second"]:>10} оп/с  '
+                    f'ошибок: {result["errors"]}'
+                )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт сохранён в {options["output"]}'
+            ))
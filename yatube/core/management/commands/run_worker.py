@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tasks import work
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Размер пула потоков; 0 — выполнять в текущем потоке.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                '--threads не может быть отрицательным, '
+                '--batch-size должен быть положительным.'
+            )
+        try:
+            done, failed = work(
+                threads=options['threads'],
+                batch_size=options['batch_size'],
+                once=options['once'],
+                poll_interval=options['poll_interval'],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
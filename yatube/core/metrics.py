@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_local = threading.local()
+
+
+class RequestTimings:
+    """Замеры одного запроса: SQL, шаблоны, время обработчика."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+        self.parallel_saved = 0.0
+        self.lock = threading.Lock()
+
+
+def start_request():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def finish_request():
+    _local.timings = None
+
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def attach(timings):
+    """Засчитывает запросы другого потока в замеры ``timings``."""
+    previous = current_timings()
+    _local.timings = timings
+    try:
+        yield
+    finally:
+        _local.timings = previous
+
+
+def record_query(duration):
+    timings = current_timings()
+    if timings is not None:
+        with timings.lock:
+            timings.queries += 1
+            timings.db += duration
+
+
+def timed_execute(execute, sql, params, many, context):
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_query(perf_counter() - started)
+
+
+def record_parallel_saved(duration):
+    timings = current_timings()
+    if timings is not None:
+        timings.parallel_saved += duration
+
+
+@contextmanager
+def template_timer():
+    """Считает время рендеринга только внешнего шаблона, без вложенных."""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    timings.template_depth += 1
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        if timings.template_depth == 0:
+            timings.template += perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.count,
+            'sum': round(self.sum, 3),
+        }
+
+
+def _view_histograms():
+    return {
+        'view_ms': Histogram(TIME_BUCKETS_MS),
+        'db_ms': Histogram(TIME_BUCKETS_MS),
+        'template_ms': Histogram(TIME_BUCKETS_MS),
+        'queries': Histogram(QUERY_BUCKETS),
+        'parallel_saved_ms': Histogram(TIME_BUCKETS_MS),
+    }
+
+
+class MetricsRegistry:
+    """Гистограммы по именам URL в памяти текущего процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(_view_histograms)
+
+    def record(self, url_name, **values):
+        with self._lock:
+            histograms = self._views[url_name]
+            for metric, value in values.items():
+                histograms[metric].observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                url_name: {
+                    metric: histogram.as_dict()
+                    for metric, histogram in histograms.items()
+                }
+                for url_name, histograms in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,88 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .routers import replica_reads
+
+PRIMARY_COOKIE = 'yatube_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы, время БД, шаблонов и обработчика.
+
+    Ставится последним в MIDDLEWARE, чтобы «view» покрывало сам обработчик
+    вместе с рендерингом шаблона. «par» — сколько сэкономили параллельные
+    загрузки core.loaders. Результат уходит в заголовок
+    ``Server-Timing`` и в гистограммы ``core.metrics.registry``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = metrics.start_request()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        metrics.timed_execute
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        view_ms = (perf_counter() - started) * 1000
+        db_ms = timings.db * 1000
+        template_ms = timings.template * 1000
+        saved_ms = timings.parallel_saved * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={db_ms:.1f};desc="{timings.queries} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'view;dur={view_ms:.1f}',
+            f'par;dur={saved_ms:.1f};desc="saved by parallel loads"',
+        ))
+        match = request.resolver_match
+        if match is not None:
+            metrics.registry.record(
+                match.view_name,
+                view_ms=view_ms,
+                db_ms=db_ms,
+                template_ms=template_ms,
+                queries=timings.queries,
+                parallel_saved_ms=saved_ms,
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Чтение своих записей при чтении с реплик.
+
+    Небезопасные запросы и запросы с cookie ``yatube_primary`` читают
+    с основной базы. Запрос, который что-то записал, ставит эту cookie
+    на REPLICA_STICKY_SECONDS, чтобы автор сразу увидел свои изменения,
+    пока реплики их догоняют. Столько же с основной базы читают запросы
+    к только что изменённым лентам (см. posts.cache.get_feed_version).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or PRIMARY_COOKIE in request.COOKIES
+        )
+        with replica_reads(pinned) as state:
+            response = self.get_response(request)
+        if state['wrote'] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
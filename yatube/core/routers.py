@@ -0,0 +1,72 @@
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Состояние текущего запроса: None вне запроса, иначе словарь
+# {'pinned': читать с основной базы, 'wrote': в запросе была запись}.
+_state = ContextVar('replica_state', default=None)
+
+PRIMARY_ONLY_APPS = {'core'}
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Разрешает чтение с реплик внутри блока, например запроса."""
+    state = {'pinned': pinned, 'wrote': False}
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def pin_primary():
+    """До конца текущего запроса читать с основной базы."""
+    state = _state.get()
+    if state is not None:
+        state['pinned'] = True
+
+
+class ReplicaRouter:
+    """Чтения внутри запроса — по кругу с реплик, всё остальное — с default.
+
+    Основная база используется для чтения, если запрос закреплён за ней
+    (небезопасный метод, cookie после недавней записи, запись в этом же
+    запросе), если открыта транзакция на default и для приложений из
+    PRIMARY_ONLY_APPS: очередь задач не терпит отставания реплики.
+    Вне запросов (обработчик очереди, команды) реплики не используются.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            state is None
+            or state['pinned']
+            or not replicas
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return replicas[next(self._counter) % len(replicas)]
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['pinned'] = state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,163 @@
+import json
+import logging
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как задачу очереди."""
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    _registry[func.task_name] = func
+    return func
+
+
+class TaskLost(Exception):
+    """Задачу вернули в очередь, пока она выполнялась."""
+
+
+def is_eager():
+    return settings.TASKS_EAGER
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит задачу в очередь или, в режиме TASKS_EAGER, выполняет сразу.
+
+    Строка задачи пишется в текущей транзакции: задача появится только
+    вместе с изменениями, которые её породили. Сама задача выполняется
+    в transaction.atomic(), поэтому изменения в базе не применяются
+    наполовину; сброс кеша, который должен идти после коммита, ставится
+    отдельной задачей.
+    """
+    name = getattr(func, 'task_name', None)
+    if _registry.get(name) is not func:
+        raise ValueError(f'{func!r} не зарегистрирована как задача.')
+    if is_eager():
+        with transaction.atomic():
+            func(*args, **kwargs)
+        return None
+    payload = json.dumps(
+        {'args': args, 'kwargs': kwargs}, cls=DjangoJSONEncoder
+    )
+    return Task.objects.create(name=name, payload=payload)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших обработчиков."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_STALE_AFTER)
+    return Task.objects.filter(
+        status=Task.RUNNING, started_at__lt=deadline
+    ).update(status=Task.PENDING, worker='')
+
+
+def claim(limit):
+    """Атомарно забирает до ``limit`` готовых к запуску задач.
+
+    Один UPDATE с проверкой статуса не даёт двум обработчикам взять
+    одну задачу, и блокировки строк базе для этого не нужны.
+    """
+    now = timezone.now()
+    ids = Task.objects.filter(
+        status=Task.PENDING, run_after__lte=now
+    ).order_by('run_after', 'id').values_list('pk', flat=True)[:limit]
+    worker = uuid.uuid4().hex
+    Task.objects.filter(pk__in=list(ids), status=Task.PENDING).update(
+        status=Task.RUNNING,
+        worker=worker,
+        started_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(
+        Task.objects.filter(status=Task.RUNNING, worker=worker).order_by('pk')
+    )
+
+
+def run_task(task):
+    """Выполняет задачу; успешная удаляется, упавшая ждёт повтора.
+
+    Изменения задачи и удаление её строки — одна транзакция: упавшая
+    задача не оставляет частичных изменений для повтора, а задача,
+    которую requeue_stale вернул в очередь, применяется только одним
+    обработчиком.
+    """
+    func = _registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {task.name}')
+        payload = json.loads(task.payload)
+        with transaction.atomic():
+            func(*payload['args'], **payload['kwargs'])
+            deleted, _ = Task.objects.filter(
+                pk=task.pk, status=Task.RUNNING, worker=task.worker
+            ).delete()
+            if not deleted:
+                raise TaskLost(task.pk)
+    except TaskLost:
+        logger.warning('Задача %s выполняется другим обработчиком', task.pk)
+        return False
+    except Exception:
+        logger.exception('Задача %s (%s) упала', task.pk, task.name)
+        if task.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            changes = {'status': Task.FAILED}
+        else:
+            delay = settings.TASKS_RETRY_DELAY * task.attempts
+            changes = {
+                'status': Task.PENDING,
+                'run_after': timezone.now() + timedelta(seconds=delay),
+            }
+        Task.objects.filter(pk=task.pk).update(
+            worker='', error=traceback.format_exc(), **changes
+        )
+        return False
+    return True
+
+
+def _run_in_thread(task):
+    try:
+        return run_task(task)
+    finally:
+        connections.close_all()
+
+
+def work(threads=4, batch_size=20, once=False, poll_interval=1.0):
+    """Цикл обработчика: забирает задачи пачками и выполняет их в пуле.
+
+    При ``threads=0`` задачи выполняются в текущем потоке. С ``once``
+    цикл завершается, когда очередь опустела. Возвращает число
+    выполненных и упавших задач.
+    """
+    done = failed = 0
+    pool = ThreadPoolExecutor(threads) if threads else None
+    try:
+        while True:
+            requeue_stale()
+            tasks = claim(batch_size)
+            if not tasks:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            runner = pool.map(_run_in_thread, tasks) if pool else map(
+                run_task, tasks
+            )
+            for ok in runner:
+                done += ok
+                failed += not ok
+    finally:
+        if pool:
+            pool.shutdown()
+    return done, failed
@@ -0,0 +1,542 @@
+import asyncio
+import importlib
+import importlib.util
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import Http404
+from django.test import (
+    Client, LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.asgi import ThreadedWsgiToAsgi
+from core.caches import cache_from_url
+from core.checks import task_queue_cache
+from core.databases import database_from_url
+from core.loaders import load
+from core.metrics import registry
+from core.middleware import PRIMARY_COOKIE
+from core.models import Task
+from core.routers import ReplicaRouter, replica_reads
+from core.tasks import claim, enqueue, run_task, task, work
+from posts.cache import FEED_VERSION_KEY, get_cache
+from posts.models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+
+    def setUp(self):
+        registry.reset()
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с БД, шаблоном и обработчиком."""
+        response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'view;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        self.assertIn('queries"', header)
+
+    def test_metrics_aggregated_per_url_name(self):
+        """Гистограммы копятся по имени URL и видны сотрудникам."""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        response = self.staff_client.get(reverse('core:request_metrics'))
+        index = response.json()['posts:index']
+        self.assertEqual(index['view_ms']['count'], 3)
+        self.assertEqual(sum(index['queries']['buckets'].values()), 3)
+        self.assertGreater(index['template_ms']['sum'], 0)
+
+    def test_metrics_hidden_from_non_staff(self):
+        """Эндпоинт метрик недоступен обычным пользователям."""
+        response = self.client.get(reverse('core:request_metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('posts:index', response.content.decode())
+
+
+class CacheFromUrlTest(SimpleTestCase):
+    def test_backends(self):
+        cases = {
+            'locmem://': 'locmem.LocMemCache',
+            'file:///var/tmp/yatube': 'filebased.FileBasedCache',
+        }
+        for url, backend in cases.items():
+            with self.subTest(url=url):
+                config = cache_from_url(url, KEY_PREFIX='test')
+                self.assertTrue(config['BACKEND'].endswith(backend))
+                self.assertEqual(config['KEY_PREFIX'], 'test')
+        self.assertEqual(
+            cache_from_url('file:///var/tmp/yatube')['LOCATION'],
+            '/var/tmp/yatube',
+        )
+
+    def test_bad_urls(self):
+        for url in ('file://', 'memcached://localhost'):
+            with self.subTest(url=url):
+                with self.assertRaises(ImproperlyConfigured):
+                    cache_from_url(url)
+
+
+class DatabaseFromUrlTest(SimpleTestCase):
+    def test_sqlite(self):
+        config = database_from_url(
+            'sqlite:///var/tmp/yatube.sqlite3?timeout=20', CONN_MAX_AGE=60
+        )
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/var/tmp/yatube.sqlite3')
+        self.assertEqual(config['OPTIONS'], {'timeout': '20'})
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+
+    def test_default_sqlite_path(self):
+        """Путь к базе по умолчанию начинается с одного слеша."""
+        path = os.path.join(settings.BASE_DIR, 'db.sqlite3')
+        with mock.patch.dict(os.environ):
+            os.environ.pop('YATUBE_DATABASE_URL', None)
+            module = importlib.reload(importlib.import_module(
+                'yatube.settings'
+            ))
+        self.assertEqual(database_from_url(module.DATABASE_URL)['NAME'], path)
+
+    @skipUnless(importlib.util.find_spec('psycopg2'), 'нужен psycopg2')
+    def test_pgbouncer(self):
+        config = database_from_url('pgbouncer://user:p%40ss@db:6432/yatube')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['NAME'], 'yatube')
+        self.assertEqual(config['PASSWORD'], 'p@ss')
+        self.assertEqual(config['PORT'], '6432')
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_bad_urls(self):
+        for url in ('sqlite://', 'mysql://localhost/yatube'):
+            with self.subTest(url=url):
+                with self.assertRaises(ImproperlyConfigured):
+                    database_from_url(url)
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        # Тестовая база в памяти: WAL и mmap для неё не применяются.
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_database', '--seconds', '0.2', '--rows', '10',
+            '--readers', '1', '--writers', '1', stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn('default', output)
+        self.assertIn('tuned', output)
+
+
+class SharedCacheTest(TestCase):
+    """Ленты поверх общего для процессов кеша в файлах.
+
+    Заменяет в тестах сервер с протоколом Redis: второй экземпляр
+    бэкенда на том же каталоге играет роль другого воркера.
+    """
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        caches = {
+            alias: cache_from_url(f'file://{location}', **{
+                key: value for key, value in config.items()
+                if key in ('KEY_PREFIX', 'VERSION')
+            })
+            for alias, config in settings.CACHES.items()
+        }
+        override = override_settings(CACHES=caches)
+        override.enable()
+        self.addCleanup(override.disable)
+        posts_config = caches['posts']
+        self.other_worker = FileBasedCache(location, {
+            'KEY_PREFIX': posts_config['KEY_PREFIX'],
+            'VERSION': posts_config['VERSION'],
+        })
+        self.author = User.objects.create_user(username='auth')
+
+    def test_feed_versions_shared_between_workers(self):
+        key = FEED_VERSION_KEY.format('index')
+        self.client.get(reverse('posts:index'))
+        version = self.other_worker.get(key)
+        self.assertIsNotNone(version)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.other_worker.get(key), version + 1)
+        self.assertContains(self.client.get(reverse('posts:index')), (
+            'Новый пост'
+        ))
+
+    def test_posts_keys_versioned(self):
+        """Смена версии ключей posts делает старые записи невидимыми."""
+        get_cache().set('probe', 1)
+        self.assertEqual(self.other_worker.get('probe'), 1)
+        self.assertIsNone(self.other_worker.get(
+            'probe', version=self.other_worker.version + 1
+        ))
+
+
+@task
+def failing_task():
+    raise RuntimeError('Сбой задачи')
+
+
+class TaskQueueCacheCheckTest(SimpleTestCase):
+    def test_queue_needs_shared_cache(self):
+        locmem = cache_from_url('locmem://')
+        shared = cache_from_url('file:///var/tmp/yatube')
+        cases = (
+            (True, locmem, []),
+            (False, shared, []),
+            (False, locmem, ['core.E001']),
+        )
+        for eager, config, expected in cases:
+            with self.subTest(eager=eager, backend=config['BACKEND']):
+                with override_settings(
+                    TASKS_EAGER=eager, CACHES={'posts': config}
+                ):
+                    errors = task_queue_cache(None)
+                self.assertEqual([error.id for error in errors], expected)
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class TaskQueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+
+    def run_worker(self):
+        call_command(
+            'run_worker', '--once', '--threads', '0', stdout=StringIO()
+        )
+
+    def test_post_side_effects_queued(self):
+        """Счётчики и ленты обновляются обработчиком, а не запросом."""
+        self.client.get(reverse('posts:index'))
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Comment.objects.create(post=post, author=self.author, text='Привет')
+        self.assertEqual(Task.objects.count(), 2)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(stats.posts_count, 0)
+        self.run_worker()
+        stats.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.comments_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertFalse(Task.objects.exists())
+        self.assertContains(self.client.get(reverse('posts:index')), (
+            'Новый пост'
+        ))
+
+    def test_claim_is_exclusive(self):
+        Post.objects.create(author=self.author, text='Пост')
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_stale_task_requeued(self):
+        Post.objects.create(author=self.author, text='Пост')
+        Task.objects.update(
+            status=Task.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        self.run_worker()
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_failed_task_retried_then_kept(self):
+        enqueue(failing_task)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(work(threads=0, once=True), (0, 2))
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn('Сбой задачи', failed.error)
+
+    def test_unregistered_function_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue(print)
+
+    def posts_count(self):
+        return AuthorStats.objects.get(author=self.author).posts_count
+
+    def test_retry_does_not_count_twice(self):
+        """Упавшая задача откатывает счётчик, повтор считает пост раз."""
+        Post.objects.create(author=self.author, text='Пост')
+        with mock.patch(
+            'posts.tasks.post_feed_scopes', side_effect=[RuntimeError, []]
+        ):
+            with self.assertLogs('core.tasks', 'ERROR'):
+                self.assertEqual(work(threads=0, once=True), (2, 1))
+        self.assertEqual(self.posts_count(), 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_requeued_task_applied_once(self):
+        """Задачу, вернувшуюся в очередь на ходу, выполняет один обработчик."""
+        Post.objects.create(author=self.author, text='Пост')
+        [running] = claim(10)
+        Task.objects.update(status=Task.PENDING, worker='')
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.assertFalse(run_task(running))
+        self.assertEqual(self.posts_count(), 0)
+        self.run_worker()
+        self.assertEqual(self.posts_count(), 1)
+
+    def test_deleted_post_not_counted(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        post.delete()
+        self.run_worker()
+        self.assertEqual(self.posts_count(), 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_round_robin_inside_request(self):
+        with replica_reads():
+            self.assertEqual(
+                [self.router.db_for_read(Post) for _ in range(3)],
+                ['replica1', 'replica2', 'replica1'],
+            )
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_primary_reads(self):
+        """Вне запроса, в закреплённом запросе и после записи — default."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads(pinned=True):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads() as state:
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertTrue(state['wrote'])
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_on_default(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+class ReplicaReadsTest(TransactionTestCase):
+    """Две SQLite-базы: основная и файл-реплика, синхронизируемый вручную."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.replica_path = os.path.join(directory, 'replica.sqlite3')
+        connections.databases['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.replica_path,
+        }
+        connections.ensure_defaults('replica1')
+        connections.prepare_test_settings('replica1')
+        self.addCleanup(self.remove_replica)
+        override = override_settings(DATABASE_REPLICAS=['replica1'])
+        override.enable()
+        self.addCleanup(override.disable)
+        for alias in ('default', 'posts'):
+            caches[alias].clear()
+        self.author = User.objects.create_user(username='auth')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.sync_replica()
+
+    def remove_replica(self):
+        connections['replica1'].close()
+        del connections.databases['replica1']
+        del connections._connections.replica1
+
+    def sync_replica(self):
+        connection.ensure_connection()
+        replica = sqlite3.connect(self.replica_path)
+        connection.connection.backup(replica)
+        replica.close()
+
+    def test_reads_from_replica(self):
+        # bulk_create не шлёт сигналов и не трогает версии лент.
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Ещё не на реплике')]
+        )
+        url = reverse('posts:api_index')
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.sync_replica()
+        results = self.client.get(url).json()['results']
+        self.assertEqual(results[0]['text'], 'Ещё не на реплике')
+
+    def test_recent_feed_change_reads_primary(self):
+        """Сразу после изменения ленты её не закешируют с реплики."""
+        Post.objects.create(author=self.author, text='Ещё не на реплике')
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertContains(response, 'Ещё не на реплике')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        later = time.time() + settings.REPLICA_STICKY_SECONDS + 1
+        with mock.patch('time.time', return_value=later):
+            response = self.client.get(url)
+        self.assertContains(response, 'Ещё не на реплике')
+
+    def test_other_feed_change_reads_replica(self):
+        """Изменение одной ленты не уводит с реплик чтение остальных."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Ещё не на реплике')]
+        )
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        response = self.client.get(reverse('posts:api_index'))
+        self.assertEqual(response.json()['results'], [])
+
+    def test_author_reads_own_writes(self):
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свой пост'}
+        )
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свой пост')
+
+
+def slow_wsgi_app(environ, start_response):
+    time.sleep(0.3)
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [threading.current_thread().name.encode()]
+
+
+async def asgi_get(application, path):
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+        'query_string': b'', 'headers': [], 'http_version': '1.1',
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages
+
+
+class AsgiTest(SimpleTestCase):
+    def test_application(self):
+        module = importlib.import_module('yatube.asgi')
+        self.assertIsInstance(module.application, ThreadedWsgiToAsgi)
+
+    def test_slow_requests_overlap(self):
+        """Медленные запросы выполняются одновременно в разных потоках."""
+        application = ThreadedWsgiToAsgi(slow_wsgi_app)
+
+        async def two_requests():
+            return await asyncio.gather(
+                asgi_get(application, '/'), asgi_get(application, '/')
+            )
+
+        started = time.perf_counter()
+        responses = asyncio.run(two_requests())
+        self.assertLess(time.perf_counter() - started, 0.5)
+        threads = {messages[1]['body'] for messages in responses}
+        self.assertEqual(len(threads), 2)
+
+
+class BenchmarkConcurrencyTest(LiveServerTestCase):
+    def test_report(self):
+        Post.objects.create(
+            author=User.objects.create_user(username='auth'), text='Пост'
+        )
+        out = StringIO()
+        call_command(
+            'benchmark_concurrency', self.live_server_url,
+            '--concurrency', '1', '--concurrency', '4', '--requests', '8',
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertIn('ошибок: 0', line)
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+class ParallelLoaderTest(TransactionTestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.author = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+
+    def test_loaders_run_in_pool(self):
+        names = load(first=thread_name, second=thread_name)
+        for name in names.values():
+            self.assertTrue(name.startswith('loader'))
+
+    def test_serial_inside_transaction(self):
+        with transaction.atomic():
+            names = load(first=thread_name, second=thread_name)
+        self.assertEqual(set(names.values()), {thread_name()})
+
+    @override_settings(LOADER_THREADS=1)
+    def test_serial_without_threads(self):
+        names = load(first=thread_name, second=thread_name)
+        self.assertEqual(set(names.values()), {thread_name()})
+
+    def test_errors_propagate(self):
+        def missing():
+            raise Http404
+
+        with self.assertRaises(Http404):
+            load(post=lambda: Post.objects.get(pk=self.post.pk),
+                 missing=missing)
+
+    def test_views_load_in_parallel(self):
+        """Запросы из потоков пула видны в Server-Timing представления."""
+        urls = {
+            reverse('posts:post_detail', args=[self.post.pk]): 'Комментарий',
+            reverse('posts:profile', args=[self.author.username]): 'Пост',
+        }
+        for url, text in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, text)
+                header = response['Server-Timing']
+                self.assertIn('par;dur=', header)
+                self.assertNotIn('"0 queries"', header)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[0])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
-from .models import Comment, Follow, Post, Group
+from .models import AuthorStats, Comment, Follow, Post, Group
+from .search import fts_available, fts_query, matching_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +18,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not fts_available() or not fts_query(search_term):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        sql, params = matching_ids(search_term)
+        return queryset.filter(pk__in=RawSQL(sql, params)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -51,7 +61,20 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'author',
+        'posts_count',
+        'comments_count',
+        'followers_count',
+        'following_count',
+    )
+    list_select_related = ('author',)
+    search_fields = ('author__username',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(AuthorStats, AuthorStatsAdmin)
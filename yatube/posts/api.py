@@ -0,0 +1,189 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_cookie
+
+from .cache import get_feed_modified, get_feed_version
+from .models import Comment, Group, Post
+from .paginators import CursorPaginator, paginate_comments
+from .timeline import follow_feed
+
+User = get_user_model()
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author__username', 'group__slug', 'image',
+)
+COMMENT_FIELDS = ('id', 'author__username', 'text', 'created')
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'author': row['author__username'],
+        'text': row['text'],
+        'created': row['created'],
+    }
+
+
+def login_required_json(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Нужно войти в систему.'},
+                status=HTTPStatus.UNAUTHORIZED,
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def make_etag(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def index_feed(request):
+    return Post.objects.all(), ('index',)
+
+
+def group_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return group.posts.all(), (f'group:{group.pk}',)
+
+
+def profile_feed(request, username):
+    author = get_object_or_404(User, username=username)
+    return author.posts.all(), (f'profile:{author.pk}',)
+
+
+def follow_index_feed(request):
+    user = request.user
+    return follow_feed(user), ('index', f'follow:{user.pk}')
+
+
+def feed_endpoint(get_feed):
+    """JSON-вариант ленты с курсором и условными заголовками.
+
+    ETag считается по дате последнего поста ленты, взятой по индексу,
+    и версии её кеша, которую меняет и правка постов; Last-Modified —
+    по той же дате и времени последнего изменения ленты. Неизменившаяся
+    лента отвечает 304 без выборки постов.
+    """
+
+    def freshness(request, *args, **kwargs):
+        if not hasattr(request, '_feed_freshness'):
+            queryset, scopes = get_feed(request, *args, **kwargs)
+            # Версия — до выборки: для недавно изменённой ленты она
+            # переводит чтение на основную базу.
+            version = get_feed_version(*scopes)
+            ordering = queryset.query.order_by or ('-pub_date', '-id')
+            latest = queryset.order_by(*ordering).values_list(
+                'pub_date', flat=True
+            ).first()
+            modified = datetime.fromtimestamp(
+                get_feed_modified(*scopes), timezone.utc
+            )
+            request._feed_freshness = (
+                queryset,
+                latest,
+                max(filter(None, (latest, modified))),
+                version,
+            )
+        return request._feed_freshness
+
+    def etag(request, *args, **kwargs):
+        _, latest, _, version = freshness(request, *args, **kwargs)
+        return make_etag(latest, version, request.GET.get('cursor', ''))
+
+    def last_modified(request, *args, **kwargs):
+        return freshness(request, *args, **kwargs)[2]
+
+    @require_GET
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, *args, **kwargs):
+        queryset = freshness(request, *args, **kwargs)[0]
+        paginator = CursorPaginator(
+            queryset.values(*POST_FIELDS, *queryset.query.annotations),
+            settings.PAGINATOR_NUM,
+        )
+        page = paginator.get_page(request.GET.get('cursor'))
+        return JsonResponse({
+            'results': [serialize_post(row) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    return view
+
+
+index = feed_endpoint(index_feed)
+group_posts = feed_endpoint(group_feed)
+profile = feed_endpoint(profile_feed)
+follow_index = vary_on_cookie(
+    login_required_json(feed_endpoint(follow_index_feed))
+)
+
+
+def post_freshness(request, post_id):
+    if not hasattr(request, '_post_freshness'):
+        post = get_object_or_404(
+            Post.objects.values(
+                *POST_FIELDS, 'author_id', 'updated_at', 'comments_count'
+            ),
+            pk=post_id,
+        )
+        last_comment = Comment.objects.filter(post_id=post_id).aggregate(
+            last=Max('updated_at')
+        )['last']
+        request._post_freshness = (
+            post,
+            max(filter(None, (post['updated_at'], last_comment))),
+            post['comments_count'],
+            get_feed_version(f'profile:{post["author_id"]}'),
+        )
+    return request._post_freshness
+
+
+def post_etag(request, post_id):
+    _, modified, comments_total, version = post_freshness(request, post_id)
+    return make_etag(modified, comments_total, version)
+
+
+def post_last_modified(request, post_id):
+    return post_freshness(request, post_id)[1]
+
+
+@require_GET
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_detail(request, post_id):
+    post = post_freshness(request, post_id)[0]
+    comments = paginate_comments(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS)
+    )
+    return JsonResponse({
+        'post': serialize_post(post),
+        'comments_count': post['comments_count'],
+        'comments': [serialize_comment(row) for row in comments],
+        'comments_next': comments.next_cursor,
+    })
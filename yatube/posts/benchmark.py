@@ -0,0 +1,150 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core import metrics
+from core.caches import cache_from_url
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+DEFAULT_DATASET = {
+    'users': 50,
+    'groups': 5,
+    'posts': 1000,
+    'follows': 200,
+    'comments': 500,
+}
+
+BENCHMARK_CACHE_URL = 'locmem://yatube-benchmark'
+
+
+def seed(users, groups, posts, follows, comments, random_seed=0):
+    """Создаёт синтетические данные для замеров."""
+    rng = random.Random(random_seed)
+    authors = mixer.cycle(users).blend(
+        User, username=mixer.sequence('bench_user_{0}')
+    )
+    mixer.cycle(groups).blend(Group, slug=mixer.sequence('bench-group-{0}'))
+    mixer.cycle(posts).blend(
+        Post, author=mixer.SELECT, group=mixer.SELECT, image=''
+    )
+    pairs = set()
+    limit = min(follows, users * (users - 1))
+    while len(pairs) < limit:
+        user, author = rng.sample(authors, 2)
+        pairs.add((user, author))
+    for user, author in pairs:
+        mixer.blend(Follow, user=user, author=author)
+    mixer.cycle(comments).blend(
+        Comment, post=mixer.SELECT, author=mixer.SELECT
+    )
+    return authors
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def recorded_queries(view_name):
+    histograms = metrics.registry.snapshot().get(view_name)
+    return histograms['queries']['sum'] if histograms else 0
+
+
+def measure(client, view_name, url, requests, cold=False):
+    """Замеряет страницу ``url`` с именем ``view_name``.
+
+    SQL-запросы считает core.metrics: так в число попадают и запросы
+    потоков core.loaders, которых не видит CaptureQueriesContext.
+    """
+    durations = []
+    queries = []
+    client.get(url)
+    started = time.perf_counter()
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        recorded = recorded_queries(view_name)
+        request_started = time.perf_counter()
+        response = client.get(url)
+        durations.append(time.perf_counter() - request_started)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} ответил {response.status_code}')
+        queries.append(recorded_queries(view_name) - recorded)
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'requests_per_second': round(requests / elapsed, 2),
+    }
+
+
+def private_caches():
+    """CACHES с теми же префиксами, но в отдельной памяти процесса."""
+    return {
+        alias: {
+            **cache_from_url(BENCHMARK_CACHE_URL),
+            **{
+                key: config[key]
+                for key in ('KEY_PREFIX', 'VERSION') if key in config
+            },
+        }
+        for alias, config in settings.CACHES.items()
+    }
+
+
+def run(requests=50, cold=False, **dataset):
+    """Заполняет базу и замеряет основные страницы постов.
+
+    Вызывать на отдельной (тестовой) базе: данные не удаляются. Кеши
+    на время замеров подменяются частными: иначе синтетические посты
+    сменили бы версии лент в общем кеше и попали к настоящим читателям,
+    а ``cold`` очищал бы рабочий кеш.
+    """
+    with override_settings(CACHES=private_caches()):
+        return _run(requests, cold, {**DEFAULT_DATASET, **dataset})
+
+
+def _run(requests, cold, dataset):
+    authors = seed(**dataset)
+    reader = max(authors, key=lambda user: user.follower.count())
+    author = max(authors, key=lambda user: user.posts.count())
+    group = Group.objects.filter(slug__startswith='bench-group-').first()
+    post = Post.objects.filter(comments__isnull=False).first() or (
+        Post.objects.first()
+    )
+    client = Client()
+    client.force_login(reader)
+    targets = {
+        'posts:index': reverse('posts:index'),
+        'posts:group_list': reverse(
+            'posts:group_list', kwargs={'slug': group.slug}
+        ),
+        'posts:profile': reverse(
+            'posts:profile', kwargs={'username': author.username}
+        ),
+        'posts:post_detail': reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}
+        ),
+        'posts:follow_index': reverse('posts:follow_index'),
+    }
+    return {
+        'dataset': dataset,
+        'requests': requests,
+        'cold_cache': cold,
+        'views': {
+            name: measure(client, name, url, requests, cold)
+            for name, url in targets.items()
+        },
+    }
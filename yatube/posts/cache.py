@@ -0,0 +1,189 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.routers import pin_primary
+
+from .models import Follow
+
+CACHE_ALIAS = 'posts'
+FEED_VERSION_KEY = 'feed-version:{}'
+FEED_MODIFIED_KEY = 'feed-modified:{}'
+POST_CARD_KEY = 'post-card:{}:{}:{}'
+FOLLOWING_KEY = 'following:{}:{}'
+ALL_FEEDS = 'all'
+
+
+def _initial_version():
+    # Начинаем не с единицы, чтобы после вытеснения ключа из кеша
+    # не совпасть с версией фрагментов, которые ещё живы.
+    return int(time.time() * 1000)
+
+
+def post_feed_scopes(author_id, group_id=None):
+    scopes = ['index', f'profile:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def get_cache():
+    """Кеш приложения со своим префиксом и версией ключей."""
+    return caches[CACHE_ALIAS]
+
+
+def get_feed_version(*scopes):
+    """Версия набора лент: меняется при любом изменении любой из них.
+
+    В строку входят и сами имена лент: счётчики разных групп или
+    авторов могут совпасть, а ключи их фрагментов — нет.
+    """
+    cache = get_cache()
+    scopes = (ALL_FEEDS,) + scopes
+    if settings.DATABASE_REPLICAS:
+        _pin_changed_feeds(scopes)
+    keys = [FEED_VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), settings.FEED_VERSION_TIMEOUT)
+            versions[key] = cache.get(key)
+    return '.'.join(
+        f'{scope}={versions[key]}' for scope, key in zip(scopes, keys)
+    )
+
+
+def bump_feed_version(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = FEED_VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), settings.FEED_VERSION_TIMEOUT)
+    now = int(time.time())
+    cache.set_many(
+        {FEED_MODIFIED_KEY.format(scope): now for scope in scopes},
+        settings.FEED_VERSION_TIMEOUT,
+    )
+
+
+def _pin_changed_feeds(scopes):
+    # Реплика могла ещё не получить изменение ленты, и страница попала бы
+    # в кеш под новой версией со старыми данными. Поэтому запрос, который
+    # берёт версию недавно изменённой ленты, дочитывает с основной базы;
+    # остальные ленты по-прежнему читаются с реплик.
+    modified = get_cache().get_many(
+        [FEED_MODIFIED_KEY.format(scope) for scope in scopes]
+    )
+    now = time.time()
+    if any(
+        now - value < settings.REPLICA_STICKY_SECONDS
+        for value in modified.values()
+    ):
+        pin_primary()
+
+
+def get_feed_modified(*scopes):
+    """Время последнего изменения набора лент (unix time).
+
+    Если отметка вытеснена из кеша, считаем ленту изменённой сейчас:
+    клиент лишний раз получит страницу, но не устаревшую.
+    """
+    cache = get_cache()
+    keys = [FEED_MODIFIED_KEY.format(scope) for scope in (ALL_FEEDS,) + scopes]
+    modified = cache.get_many(keys)
+    for key in keys:
+        if key not in modified:
+            cache.add(key, int(time.time()), settings.FEED_VERSION_TIMEOUT)
+            modified[key] = cache.get(key)
+    return max(modified.values())
+
+
+def feed_cache(*scopes):
+    """Параметры для ``{% cache %}`` вокруг списка постов ленты."""
+    return {
+        'alias': CACHE_ALIAS,
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+        'version': get_feed_version(*scopes),
+    }
+
+
+def feed_freshness(request, *scopes):
+    """ETag и Last-Modified страницы ленты без запросов к БД.
+
+    Обе величины берутся из версий лент в кеше, которые сигналы меняют
+    при каждом изменении постов, поэтому отдельно считать max(pub_date)
+    и число постов не нужно.
+    """
+    user = request.user
+    if user.is_authenticated:
+        scopes += (f'follow:{user.pk}',)
+    raw = ':'.join((
+        get_feed_version(*scopes),
+        str(user.pk),
+        request.get_full_path(),
+    ))
+    return {
+        'etag': hashlib.md5(raw.encode()).hexdigest(),
+        'last_modified': get_feed_modified(*scopes),
+    }
+
+
+def page_freshness(request, last_modified, *parts):
+    """ETag и Last-Modified страницы по времени последней правки.
+
+    ``parts`` — прочие данные страницы, которые меняются без правки
+    показанных на ней записей.
+    """
+    raw = ':'.join(str(part) for part in (
+        request.user.pk, request.get_full_path(), last_modified.isoformat()
+    ) + parts)
+    return {
+        'etag': hashlib.md5(raw.encode()).hexdigest(),
+        'last_modified': int(last_modified.timestamp()),
+    }
+
+
+def post_card_key(post, show_author=True):
+    """Ключ карточки поста по времени правки поста, группы и автора.
+
+    Правка поста или группы и смена имени автора дают новый ключ,
+    поэтому карточки не нужно сбрасывать: старые вытесняются сами.
+    """
+    author = post.author
+    group_version = post.group.updated_at.timestamp() if post.group_id else ''
+    raw = '\0'.join((
+        author.username, author.get_full_name(), str(group_version)
+    ))
+    digest = hashlib.md5(raw.encode()).hexdigest()[:12]
+    return POST_CARD_KEY.format(
+        post.pk,
+        f'{post.updated_at.timestamp()}:{int(show_author)}',
+        digest,
+    )
+
+
+def get_following_ids(user):
+    """Множество id авторов, на которых подписан ``user``.
+
+    Ключ включает версию ленты подписок, которую меняют сигналы Follow,
+    так что после подписки или отписки набор перечитывается из базы.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    cache = get_cache()
+    key = FOLLOWING_KEY.format(
+        user.pk, get_feed_version(f'follow:{user.pk}')
+    )
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+        cache.set(key, ids, settings.FEED_CACHE_TIMEOUT)
+    return ids
@@ -1,6 +1,14 @@
+from functools import partial
+
 from django import forms
+from django.db import transaction
+
+from core.tasks import enqueue, is_eager
 
+from .cache import post_feed_scopes
 from .models import Post, Comment
+from .tasks import generate_post_thumbnail
+from .thumbnails import schedule_thumbnail
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +16,18 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and post.image and 'image' in self.changed_data:
+            scopes = post_feed_scopes(post.author_id, post.group_id)
+            if is_eager():
+                transaction.on_commit(partial(
+                    schedule_thumbnail, post.image.name, scopes
+                ))
+            else:
+                enqueue(generate_post_thumbnail, post.image.name, scopes)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов к БД и пропускную способность '
+        'страниц постов на синтетических данных во временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DEFAULT_DATASET.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name} (по умолчанию {default}).'
+            )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов на каждую страницу.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--output', help='Куда сохранить отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['groups'] < 1:
+            raise CommandError('Нужно минимум 2 пользователя и 1 группа.')
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один запрос.')
+        dataset = {
+            name: options[name] for name in benchmark.DEFAULT_DATASET
+        }
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            report = benchmark.run(
+                requests=options['requests'], cold=options['cold'], **dataset
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        for name, result in report['views'].items():
+            self.stdout.write(
+                f'{name:<20} p50 {result["p50_ms"]:>8} ms  '
+                f'p95 {result["p95_ms"]:>8} ms  '
+                f'{result["queries_per_request"]:>6} queries  '
+                f'{result["requests_per_second"]:>8} req/s'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт сохранён в {options["output"]}'
+            ))
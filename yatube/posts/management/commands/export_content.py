@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts.models import Comment, Follow, Post
+
+EXPORTS = (
+    (
+        'posts',
+        Post,
+        'pub_date',
+        (
+            'id', 'text', 'pub_date', 'author_id', 'author__username',
+            'group_id', 'group__slug', 'image',
+        ),
+    ),
+    (
+        'comments',
+        Comment,
+        'created',
+        (
+            'id', 'post_id', 'author_id', 'author__username', 'text',
+            'created',
+        ),
+    ),
+    ('follows', Follow, None, ('id', 'user_id', 'author_id')),
+)
+
+
+def parse_since(value):
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Не удалось разобрать дату {value}.')
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return since
+
+
+def iterate_keyset(queryset, fields, batch_size):
+    """Строки по возрастанию id пачками, без OFFSET и без всей таблицы."""
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_id).order_by('pk').values(
+                *fields
+            )[:batch_size].iterator(chunk_size=batch_size)
+        )
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]['id']
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии и подписки в сжатые JSONL-файлы. '
+        'С --since выгружаются только посты и комментарии новее даты; '
+        'подписки без даты создания выгружаются целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir', help='Каталог для файлов <model>.jsonl.gz.'
+        )
+        parser.add_argument(
+            '--since',
+            help='Выгрузить записи не старше даты (ISO 8601).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк читать из БД за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        since = parse_since(options['since']) if options['since'] else None
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for name, model, date_field, fields in EXPORTS:
+            queryset = model.objects.all()
+            if since is not None and date_field is not None:
+                queryset = queryset.filter(**{f'{date_field}__gte': since})
+            path = os.path.join(options['output_dir'], f'{name}.jsonl.gz')
+            count = 0
+            with gzip.open(path, 'wt', encoding='utf-8') as output:
+                rows = iterate_keyset(queryset, fields, options['batch_size'])
+                for row in rows:
+                    output.write(json.dumps(
+                        row, cls=DjangoJSONEncoder, ensure_ascii=False
+                    ))
+                    output.write('\n')
+                    count += 1
+            self.stdout.write(f'{name}: {count} строк -> {path}')
@@ -0,0 +1,40 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.cache import ALL_FEEDS, bump_feed_version
+from posts.models import Post
+from posts.thumbnails import generate_thumbnail
+
+
+class Command(BaseCommand):
+    help = 'Заранее создаёт миниатюры картинок постов в нескольких процессах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=20,
+            help='Сколько картинок отдавать процессу за раз.'
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').order_by().values_list(
+                'image', flat=True
+            ).distinct()
+        )
+        # Дочерние процессы не должны делить соединение с родителем.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(
+                generate_thumbnail, names, chunksize=options['chunk_size']
+            ))
+        bump_feed_version(ALL_FEEDS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр готово: {sum(results)} из {len(names)}'
+        ))
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest
 
 User = get_user_model()
 
@@ -19,6 +20,7 @@ class Post(models.Model):
         help_text='Выберите сообщество'
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField('Изменён', auto_now=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -29,11 +31,27 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -43,6 +61,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField('Изменена', auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
@@ -64,6 +83,15 @@ class Comment(models.Model):
         help_text='Напишите свой комментарий'
     )
     created = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField('Изменён', auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -84,3 +112,112 @@ class Follow(models.Model):
                 fields=['user', 'author'], name="unique_follow_users"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+def _count_of(model, field):
+    counts = model.objects.filter(
+        **{field: models.OuterRef('pk')}
+    ).order_by().values(field).annotate(
+        total=models.Count('pk')
+    ).values('total')
+    return Coalesce(models.Subquery(counts), 0)
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+    def for_author(self, author):
+        try:
+            return author.stats
+        except AuthorStats.DoesNotExist:
+            return self.get_or_create(author=author)[0]
+
+    def change(self, author_id, **deltas):
+        """Атомарно сдвигает счётчики автора на заданные величины."""
+        updates = {
+            field: (
+                models.F(field) + delta if delta > 0
+                else Greatest(models.F(field) + delta, 0)
+            )
+            for field, delta in deltas.items()
+        }
+        with transaction.atomic():
+            if self.filter(author_id=author_id).update(**updates):
+                return
+            if all(delta < 0 for delta in deltas.values()):
+                return
+            self.get_or_create(author_id=author_id)
+            self.filter(author_id=author_id).update(**updates)
+
+    def rebuild(self, batch_size=1000):
+        """Пересчитывает статистику всех авторов с нуля."""
+        users = User.objects.annotate(
+            posts_total=_count_of(Post, 'author'),
+            comments_total=_count_of(Comment, 'author'),
+            followers_total=_count_of(Follow, 'author'),
+            following_total=_count_of(Follow, 'user'),
+        ).order_by('pk')
+        with transaction.atomic():
+            self.all().delete()
+            batch = []
+            for user in users.iterator(chunk_size=batch_size):
+                batch.append(AuthorStats(
+                    author_id=user.pk,
+                    posts_count=user.posts_total,
+                    comments_count=user.comments_total,
+                    followers_count=user.followers_total,
+                    following_count=user.following_total,
+                ))
+                if len(batch) == batch_size:
+                    self.bulk_create(batch)
+                    batch = []
+            self.bulk_create(batch)
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    objects = AuthorStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_post'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import get_cache, get_feed_version
+
+
+FEED_COUNT_KEY = 'feed-count:{}:{}'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        return json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def _dump(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class CursorPage(Sequence):
+    """Страница keyset-пагинации: без номера и без общего количества."""
+
+    cursor_paginated = True
+
+    def __init__(self, object_list, paginator, cursor='', next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page of %s items>' % len(self)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу сортировки вместо COUNT(*) и OFFSET.
+
+    Последний столбец ``ordering`` должен быть уникальным (обычно ``id``),
+    чтобы граница страницы определялась однозначно. По умолчанию берётся
+    сортировка самого queryset, а без неё — ``('-pub_date', '-id')``.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = object_list.query.order_by or ('-pub_date', '-id')
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [_dump(obj[field]) for field in self.fields]
+        return [_dump(getattr(obj, field)) for field in self.fields]
+
+    def _field(self, name):
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _parse(self, cursor):
+        data = decode_cursor(cursor)
+        try:
+            direction, key = data['d'], data['k']
+        except (KeyError, TypeError):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'prev') or not isinstance(key, list):
+            raise InvalidCursor(cursor)
+        if len(key) != len(self.fields):
+            raise InvalidCursor(cursor)
+        try:
+            key = [
+                self._field(field).to_python(value)
+                for field, value in zip(self.fields, key)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            # Вместо строки даты в ключе может оказаться число или список.
+            raise InvalidCursor(cursor)
+        if any(value is None for value in key):
+            raise InvalidCursor(cursor)
+        return direction, key
+
+    def _seek(self, key, backwards):
+        condition = Q()
+        for i, (field, ordering) in enumerate(zip(self.fields, self.ordering)):
+            descending = ordering.startswith('-') != backwards
+            lookup = '%s__%s' % (field, 'lt' if descending else 'gt')
+            step = Q(**{lookup: key[i]})
+            for prev_field, prev_value in zip(self.fields[:i], key[:i]):
+                step &= Q(**{prev_field: prev_value})
+            condition |= step
+        return condition
+
+    def _cursor(self, direction, obj):
+        return encode_cursor({'d': direction, 'k': self._key(obj)})
+
+    def page(self, cursor=None):
+        """Возвращает страницу после (или до) позиции из ``cursor``."""
+        direction, key = ('next', None) if not cursor else self._parse(cursor)
+        backwards = direction == 'prev'
+        if backwards:
+            ordering = [
+                field[1:] if field.startswith('-') else '-' + field
+                for field in self.ordering
+            ]
+        else:
+            ordering = self.ordering
+        queryset = self.object_list.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self._seek(key, backwards))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+        if not items:
+            return CursorPage(items, self, cursor=cursor or '')
+        return CursorPage(
+            items,
+            self,
+            cursor=cursor or '',
+            next_cursor=self._cursor('next', items[-1]) if has_next else None,
+            previous_cursor=(
+                self._cursor('prev', items[0]) if has_previous else None
+            ),
+        )
+
+    def get_page(self, cursor=None):
+        """Как ``page()``, но при битом курсоре отдаёт первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который не считает COUNT(*) ленты на каждый запрос.
+
+    Количество либо передаётся готовым (``count``), либо берётся из кеша
+    по версии лент ``scopes``: новый или удалённый пост меняет версию,
+    а FEED_COUNT_TIMEOUT ограничивает срок жизни числа после записей
+    в обход сигналов.
+    """
+
+    def __init__(self, object_list, per_page, scopes=(), count=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scopes = tuple(scopes)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if not self.scopes:
+            return super().count
+        cache = get_cache()
+        key = FEED_COUNT_KEY.format(
+            ','.join(self.scopes), get_feed_version(*self.scopes)
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.FEED_COUNT_TIMEOUT)
+        return count
+
+    def page(self, number):
+        # Срез не обрезается по count: приблизительное число не должно
+        # терять посты на последней странице.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if number == self.num_pages:
+            top += self.orphans
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+
+def paginate(request, queryset, scopes=(), count=None):
+    """Страница ленты: keyset-пагинация, если передан ``?cursor=``.
+
+    ``scopes`` и ``count`` передаются в CachedCountPaginator.
+    """
+    if 'cursor' in request.GET:
+        paginator = CursorPaginator(queryset, settings.PAGINATOR_NUM)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = CachedCountPaginator(
+        queryset, settings.PAGINATOR_NUM, scopes=scopes, count=count
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def paginate_comments(queryset, cursor=None):
+    """Страница комментариев поста от старых к новым."""
+    paginator = CursorPaginator(
+        queryset, settings.COMMENTS_PER_PAGE, ordering=('created', 'id')
+    )
+    return paginator.get_page(cursor)
@@ -0,0 +1,151 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginators import (
+    CursorPage, CursorPaginator, InvalidCursor, decode_cursor, encode_cursor
+)
+
+# SQLite пересоздаёт posts_post при изменении схемы и теряет триггеры
+# индекса: такие миграции восстанавливают их сами (см. 0015_updated_at).
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_TOKENS = 24
+# Границы совпадения в snippet(): управляющие символы не встречаются
+# в тексте и переживают экранирование, после которого их меняем на <mark>.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+SEARCH_SQL = (
+    "SELECT rowid AS id, bm25({table}) AS rank, "
+    "snippet({table}, 0, char(2), char(3), '…', {tokens}) "
+    "FROM {table} WHERE {table} MATCH %s"
+).format(table=FTS_TABLE, tokens=SNIPPET_TOKENS)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(text):
+    """Строка запроса FTS5: все слова обязательны, последнее — префикс."""
+    words = _WORD.findall(text or '')
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(MATCH_START, '<mark>').replace(
+            MATCH_END, '</mark>'
+        )
+    )
+
+
+def matching_ids(text):
+    """Подзапрос с id постов, подходящих под запрос."""
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [fts_query(text)],
+    )
+
+
+class SearchPaginator:
+    """Keyset-пагинация результатов FTS5 по (rank, id)."""
+
+    def __init__(self, text, per_page):
+        self.query = fts_query(text)
+        self.per_page = int(per_page)
+
+    def _parse(self, cursor):
+        data = decode_cursor(cursor)
+        try:
+            direction, (rank, pk) = data['d'], data['k']
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'prev'):
+            raise InvalidCursor(cursor)
+        if not isinstance(rank, (int, float)) or not isinstance(pk, int):
+            raise InvalidCursor(cursor)
+        return direction, [rank, pk]
+
+    def _fetch(self, key, backwards):
+        sql = f'SELECT * FROM ({SEARCH_SQL})'
+        params = [self.query]
+        if key is not None:
+            op = '<' if backwards else '>'
+            sql += f' WHERE rank {op} %s OR (rank = %s AND id {op} %s)'
+            params += [key[0], key[0], key[1]]
+        order = 'DESC' if backwards else 'ASC'
+        sql += f' ORDER BY rank {order}, id {order} LIMIT %s'
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def page(self, cursor=None):
+        if not self.query:
+            return CursorPage([], self, cursor=cursor or '')
+        direction, key = ('next', None) if not cursor else self._parse(cursor)
+        backwards = direction == 'prev'
+        rows = self._fetch(key, backwards)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for pk, _, _ in rows]
+        )
+        items = []
+        for pk, rank, snippet in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                items.append(post)
+        if not rows:
+            return CursorPage(items, self, cursor=cursor or '')
+        first, last = rows[0], rows[-1]
+        return CursorPage(
+            items,
+            self,
+            cursor=cursor or '',
+            next_cursor=encode_cursor(
+                {'d': 'next', 'k': [last[1], last[0]]}
+            ) if has_next else None,
+            previous_cursor=encode_cursor(
+                {'d': 'prev', 'k': [first[1], first[0]]}
+            ) if has_previous else None,
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def search_page(text, per_page, cursor=None):
+    """Страница результатов поиска постов по ``text``.
+
+    На SQLite ищет по индексу FTS5 с ранжированием bm25 и подсветкой,
+    на других базах — медленным ``icontains`` по дате публикации.
+    """
+    if fts_available():
+        return SearchPaginator(text, per_page).get_page(cursor)
+    queryset = Post.objects.select_related('author', 'group')
+    words = _WORD.findall(text or '')
+    if not words:
+        queryset = queryset.none()
+    for word in words:
+        queryset = queryset.filter(text__icontains=word)
+    return CursorPaginator(queryset, per_page).get_page(cursor)
@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.tasks import enqueue
+
+from .cache import ALL_FEEDS, bump_feed_version, post_feed_scopes
+from . import tasks, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Поля автора, которые видны в карточках постов всех лент.
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    scopes = post_feed_scopes(instance.author_id, instance.group_id)
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id not in (None, instance.group_id):
+        scopes.append(f'group:{previous_group_id}')
+    bump_feed_version(*scopes)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    bump_feed_version(ALL_FEEDS)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    bump_feed_version(f'follow:{instance.user_id}')
+
+
+@receiver(pre_save, sender=User)
+def remember_author_name(sender, instance, update_fields=None, **kwargs):
+    instance._previous_name = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(AUTHOR_NAME_FIELDS)
+    ):
+        return
+    instance._previous_name = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*AUTHOR_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, **kwargs):
+    # Имя автора есть в лентах всех видов, а не только в его профиле.
+    previous = getattr(instance, '_previous_name', None)
+    current = tuple(getattr(instance, field) for field in AUTHOR_NAME_FIELDS)
+    if not created and previous not in (None, current):
+        bump_feed_version(ALL_FEEDS)
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(author=instance)
+
+
+@receiver(post_save, sender=Post)
+def enqueue_new_post_tasks(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(
+            tasks.process_new_post,
+            instance.pk,
+            instance.author_id,
+            instance.group_id,
+        )
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    AuthorStats.objects.change(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def enqueue_new_comment_tasks(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(
+            tasks.process_new_comment, instance.post_id, instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    AuthorStats.objects.change(instance.author_id, comments_count=-1)
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=Greatest(F('comments_count') - 1, 0),
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.change(instance.author_id, followers_count=1)
+        AuthorStats.objects.change(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    AuthorStats.objects.change(instance.author_id, followers_count=-1)
+    AuthorStats.objects.change(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and timeline.is_materialized():
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    if timeline.is_materialized():
+        timeline.trim(instance.user_id, instance.author_id)
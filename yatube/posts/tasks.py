@@ -0,0 +1,47 @@
+from django.db.models import F
+from django.utils import timezone
+
+from core.tasks import enqueue, task
+
+from . import timeline
+from .cache import bump_feed_version, post_feed_scopes
+from .models import AuthorStats, Post
+from .thumbnails import generate_thumbnail
+
+
+@task
+def bump_feeds(*scopes):
+    """Сброс кеша лент отдельной задачей: после коммита её изменений."""
+    bump_feed_version(*scopes)
+
+
+@task
+def process_new_post(post_id, author_id, group_id):
+    """Счётчики, раскладка нового поста по лентам и сброс их кеша.
+
+    Пост, удалённый до запуска задачи, уже вычтен из счётчика
+    и в ленты не попадает.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    AuthorStats.objects.change(author_id, posts_count=1)
+    if timeline.is_materialized():
+        timeline.fan_out_post(post)
+    enqueue(bump_feeds, *post_feed_scopes(author_id, group_id))
+
+
+@task
+def process_new_comment(post_id, author_id):
+    AuthorStats.objects.change(author_id, comments_count=1)
+    # Новая отметка правки: Last-Modified страницы поста учитывает
+    # и комментарии за пределами первой страницы.
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + 1, updated_at=timezone.now()
+    )
+
+
+@task
+def generate_post_thumbnail(name, feed_scopes):
+    if generate_thumbnail(name):
+        enqueue(bump_feeds, *feed_scopes)
@@ -0,0 +1,27 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page_obj, on_each_side=2):
+    """Номера страниц вокруг текущей, первая и последняя.
+
+    Пропуски между ними обозначены ``None``, поэтому число ссылок
+    не растёт вместе с лентой.
+    """
+    number = page_obj.number
+    last = page_obj.paginator.num_pages
+    start = max(number - on_each_side, 1)
+    end = min(number + on_each_side, last)
+    window = []
+    if start > 1:
+        window.append(1)
+        if start > 2:
+            window.append(None)
+    window.extend(range(start, end + 1))
+    if end < last:
+        if end < last - 1:
+            window.append(None)
+        window.append(last)
+    return window
@@ -0,0 +1,40 @@
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.cache import get_cache, post_card_key
+from posts.thumbnails import get_ready_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, show_author=True):
+    """Пары (пост, HTML карточки) с кешированием каждой карточки.
+
+    Готовые карточки страницы достаются одним get_many, недостающие
+    рендерятся и сохраняются одним set_many. Карточку, картинка которой
+    ещё без миниатюры, не кешируем: иначе оригинал застрял бы в кеше.
+    """
+    posts = list(posts)
+    cache = get_cache()
+    keys = [post_card_key(post, show_author) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            thumbnail = get_ready_thumbnail(post.image)
+            html = render_to_string('posts/includes/post_card.html', {
+                'post': post,
+                'show_author': show_author,
+                'thumbnail': thumbnail or False,
+            })
+            if thumbnail or not post.image:
+                missing[key] = html
+        cards.append((post, mark_safe(html)))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
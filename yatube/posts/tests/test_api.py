@@ -0,0 +1,160 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_return_posts(self):
+        """JSON-ленты отдают посты в порядке ленты."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.author.username]),
+            reverse('posts:api_follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                results = response.json()['results']
+                self.assertEqual(
+                    [post['id'] for post in results],
+                    [post.pk for post in reversed(self.posts)],
+                )
+                self.assertEqual(results[0]['author'], 'auth')
+                self.assertEqual(results[0]['group'], 'test-slug')
+                self.assertIsNone(results[0]['image'])
+
+    def test_follow_requires_login(self):
+        response = self.client.get(reverse('posts:api_follow_index'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_missing_objects(self):
+        urls = (
+            reverse('posts:api_group_list', args=['missing']),
+            reverse('posts:api_profile', args=['missing']),
+            reverse('posts:api_post_detail', args=[0]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(PAGINATOR_NUM=2)
+    def test_cursor_pagination(self):
+        url = reverse('posts:api_index')
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_not_modified(self):
+        """Неизменившаяся лента отвечает 304 одним запросом к БД."""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_freshness_reads_latest_post_only(self):
+        """Для 304 читается только последний пост ленты, без агрегатов."""
+        urls = (
+            reverse('posts:api_profile', args=[self.author.username]),
+            reverse('posts:api_follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.reader_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                feed_queries = [
+                    query['sql'] for query in queries
+                    if 'posts_post' in query['sql']
+                ]
+                self.assertEqual(len(feed_queries), 1)
+                self.assertIn('LIMIT 1', feed_queries[0])
+                self.assertNotIn('MAX(', feed_queries[0])
+
+    def test_etag_changes(self):
+        """Новый или изменённый пост меняет ETag ленты."""
+        url = reverse('posts:api_profile', args=[self.author.username])
+        etag = self.client.get(url)['ETag']
+        self.posts[1].text = 'Исправленный пост'
+        self.posts[1].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        etag = response['ETag']
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_post_detail(self):
+        """Пост отдаётся с комментариями, новый комментарий меняет ETag."""
+        post = self.posts[0]
+        url = reverse('posts:api_post_detail', args=[post.pk])
+        response = self.client.get(url)
+        data = response.json()
+        self.assertEqual(data['post']['text'], post.text)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий'],
+        )
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED,
+        )
+        Comment.objects.create(post=post, author=self.author, text='Ещё')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK,
+        )
@@ -0,0 +1,61 @@
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from posts import benchmark
+from posts.cache import get_cache, get_feed_version
+from posts.models import Post
+
+
+class BenchmarkTest(TestCase):
+    def test_report_covers_all_views(self):
+        """Отчёт содержит метрики по каждой странице."""
+        report = benchmark.run(
+            requests=3, users=4, groups=1, posts=15, follows=5, comments=5
+        )
+        self.assertEqual(report['dataset']['posts'], 15)
+        self.assertEqual(
+            set(report['views']),
+            {
+                'posts:index',
+                'posts:group_list',
+                'posts:profile',
+                'posts:post_detail',
+                'posts:follow_index',
+            }
+        )
+        for name, result in report['views'].items():
+            with self.subTest(view=name):
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertGreater(result['queries_per_request'], 0)
+                self.assertGreater(result['requests_per_second'], 0)
+
+    def test_configured_cache_untouched(self):
+        """Замеры не меняют версии лент и не чистят настроенный кеш."""
+        version = get_feed_version('index')
+        get_cache().set('benchmark-sentinel', 1)
+        benchmark.run(
+            requests=1, cold=True,
+            users=2, groups=1, posts=3, follows=1, comments=1,
+        )
+        self.assertEqual(get_feed_version('index'), version)
+        self.assertEqual(get_cache().get('benchmark-sentinel'), 1)
+
+
+class BenchmarkQueriesTest(TransactionTestCase):
+    def test_counts_loader_threads(self):
+        """Запросы из потоков core.loaders входят в число запросов."""
+        benchmark.seed(users=2, groups=1, posts=3, follows=1, comments=3)
+        post = Post.objects.filter(comments__isnull=False).first()
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        client = Client()
+        parallel = benchmark.measure(
+            client, 'posts:post_detail', url, 2, cold=True
+        )
+        with override_settings(LOADER_THREADS=1):
+            serial = benchmark.measure(
+                client, 'posts:post_detail', url, 2, cold=True
+            )
+        self.assertEqual(
+            parallel['queries_per_request'], serial['queries_per_request']
+        )
@@ -0,0 +1,279 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from posts.cache import get_feed_version
+from posts.management.commands.import_posts import Command as ImportCommand
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+from posts.tests.test_thumbnails import SORL_CAN_RESIZE
+from posts.thumbnails import get_ready_thumbnail
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.source_dir = tempfile.mkdtemp()
+        with open(os.path.join(cls.source_dir, 'small.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(cls.source_dir, ignore_errors=True)
+
+    def import_file(self, name, rows, writer):
+        path = os.path.join(self.source_dir, name)
+        with open(path, 'w', newline='', encoding='utf-8') as output:
+            writer(output, rows)
+        call_command(
+            'import_posts', path, '--batch-size', '2',
+            '--images-dir', self.source_dir, stdout=StringIO()
+        )
+
+    def test_import_jsonl(self):
+        """Посты из JSONL создаются пачками, чужие строки пропускаются."""
+        rows = [
+            {
+                'text': 'Первый',
+                'author': 'auth',
+                'group': 'test-slug',
+                'pub_date': '2021-01-01T10:00:00+00:00',
+                'image': 'small.gif',
+            },
+            {'text': 'Второй', 'author': 'auth'},
+            {'text': 'Третий', 'author': 'auth'},
+            {'text': 'Без автора', 'author': 'nobody'},
+            {'text': 'Без группы', 'author': 'auth', 'group': 'missing'},
+        ]
+
+        def write_jsonl(output, rows):
+            for row in rows:
+                output.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+        self.import_file('posts.jsonl', rows, write_jsonl)
+        self.assertEqual(Post.objects.count(), 3)
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.pub_date.year, 2021)
+        self.assertTrue(first.image.name.startswith('posts/small'))
+        self.assertTrue(os.path.exists(first.image.path))
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).posts_count, 3
+        )
+
+    def test_import_csv(self):
+        """CSV импортируется так же, как JSONL."""
+        rows = [
+            {'text': 'Из CSV', 'author': 'auth', 'group': 'test-slug'},
+            {'text': 'Ещё из CSV', 'author': 'auth', 'group': ''},
+        ]
+
+        def write_csv(output, rows):
+            writer = csv.DictWriter(
+                output, fieldnames=['text', 'author', 'group']
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+        self.import_file('posts.csv', rows, write_csv)
+        self.assertEqual(
+            set(Post.objects.values_list('text', 'group')),
+            {('Из CSV', self.group.pk), ('Ещё из CSV', None)}
+        )
+
+    def test_bad_lines_skipped(self):
+        """Битые строки JSONL пропускаются с номером, ленты обновляются."""
+        path = os.path.join(self.source_dir, 'broken.jsonl')
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write('{"text": "До", "author": "auth"}\n')
+            output.write('{"text": "оборвано\n')
+            output.write('[1, 2]\n')
+            for row in (
+                {'text': 'Дата', 'author': 'auth',
+                 'pub_date': '2021-13-45T10:00:00'},
+                {'text': 'Автор', 'author': 'nobody'},
+                {'text': 'Группа', 'author': 'auth', 'group': 'missing'},
+                {'text': 'Картинка', 'author': 'auth', 'image': 'none.gif'},
+                {'text': 'После', 'author': 'auth'},
+            ):
+                output.write(json.dumps(row) + '\n')
+        version = get_feed_version()
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, '--batch-size', '2',
+            '--images-dir', self.source_dir, stdout=out, stderr=err,
+        )
+        self.assertEqual(
+            set(Post.objects.values_list('text', flat=True)), {'До', 'После'}
+        )
+        errors = err.getvalue().splitlines()
+        self.assertEqual(len(errors), 6)
+        for number, reason in enumerate((
+            'не JSON', 'объект', 'дата', 'автор', 'групп', 'картинк'
+        ), 2):
+            with self.subTest(line=number):
+                self.assertIn(f'Строка {number} пропущена', errors[number - 2])
+                self.assertIn(reason, errors[number - 2])
+        self.assertIn('пропущено: 6', out.getvalue())
+        self.assertNotEqual(get_feed_version(), version)
+
+    def test_finish_after_failure(self):
+        """Если пачка упала, записанное раньше всё равно попадает в ленты."""
+        path = os.path.join(self.source_dir, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as output:
+            for text in ('Первый', 'Второй'):
+                output.write(json.dumps({'text': text, 'author': 'auth'}))
+                output.write('\n')
+        import_batch = ImportCommand.import_batch
+        calls = []
+
+        def failing_batch(command, rows):
+            calls.append(rows)
+            if len(calls) > 1:
+                raise RuntimeError('сбой')
+            import_batch(command, rows)
+
+        version = get_feed_version()
+        with mock.patch.object(ImportCommand, 'import_batch', failing_batch):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_posts', path, '--batch-size', '1',
+                    stdout=StringIO(),
+                )
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertNotEqual(get_feed_version(), version)
+
+
+@skipUnless(SORL_CAN_RESIZE, 'sorl-thumbnail не работает с этим Pillow')
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PregenerateThumbnailsTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        author = User.objects.create_user(username='auth')
+        self.posts = [
+            Post.objects.create(
+                author=author,
+                text=f'Пост {number}',
+                image=SimpleUploadedFile(
+                    f'pregenerate_{number}.gif', SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+            for number in range(2)
+        ]
+        Post.objects.create(author=author, text='Без картинки')
+
+    def test_pregenerate(self):
+        """Команда создаёт миниатюры всех картинок и обновляет ленты."""
+        version = get_feed_version()
+        out = StringIO()
+        # Тестовая база SQLite в памяти не видна дочерним процессам.
+        with mock.patch(
+            'posts.management.commands.pregenerate_thumbnails.'
+            'ProcessPoolExecutor', ThreadPoolExecutor
+        ):
+            call_command(
+                'pregenerate_thumbnails', '--workers', '2', stdout=out
+            )
+        self.assertIn('Миниатюр готово: 2 из 2', out.getvalue())
+        for post in self.posts:
+            with self.subTest(post=post.text):
+                self.assertIsNotNone(get_ready_thumbnail(post.image))
+        self.assertNotEqual(get_feed_version(), version)
+
+
+class ExportContentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        posts = [
+            Post.objects.create(author=cls.author, text=f'Текст {i}')
+            for i in range(5)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in posts[:2]]).update(
+            pub_date='2020-01-01T00:00:00Z'
+        )
+        Comment.objects.create(
+            post=posts[-1], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, True)
+
+    def read(self, name):
+        path = os.path.join(self.output_dir, f'{name}.jsonl.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            return [json.loads(line) for line in source]
+
+    def test_full_export(self):
+        """Выгружаются все модели, пачки не теряют и не дублируют строки."""
+        call_command(
+            'export_content', self.output_dir, '--batch-size', '2',
+            stdout=StringIO()
+        )
+        posts = self.read('posts')
+        self.assertEqual(
+            [row['id'] for row in posts],
+            sorted(Post.objects.values_list('pk', flat=True))
+        )
+        self.assertEqual(posts[0]['author__username'], 'auth')
+        self.assertEqual(len(self.read('comments')), 1)
+        self.assertEqual(
+            self.read('follows'),
+            [{
+                'id': Follow.objects.get().pk,
+                'user_id': self.reader.pk,
+                'author_id': self.author.pk,
+            }]
+        )
+
+    def test_incremental_export(self):
+        """--since оставляет только свежие посты и комментарии."""
+        call_command(
+            'export_content', self.output_dir, '--since', '2021-01-01',
+            stdout=StringIO()
+        )
+        self.assertEqual(len(self.read('posts')), 3)
+        self.assertEqual(len(self.read('comments')), 1)
+        self.assertEqual(len(self.read('follows')), 1)
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -146,6 +147,38 @@ class PostCreateEditFormTests(TestCase):
         )
         self.assertEqual(Post.objects.count(), posts_count)
 
+    def test_image_thumbnail_scheduled_after_commit(self):
+        """Миниатюра новой картинки создаётся после коммита, вне запроса."""
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=(
+                b'\x47\x49\x46\x38\x39\x61\x01\x00'
+                b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+                b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+                b'\x00\x00\x01\x00\x01\x00\x00\x02'
+                b'\x02\x4c\x01\x00\x3b'
+            ),
+            content_type='image/gif'
+        )
+        form = PostForm(
+            data={'text': 'Текст'},
+            files={'image': uploaded},
+            instance=Post(author=self.user),
+        )
+        self.assertTrue(form.is_valid())
+        with mock.patch('posts.forms.schedule_thumbnail') as schedule:
+            with mock.patch('posts.forms.transaction.on_commit') as on_commit:
+                post = form.save()
+            schedule.assert_not_called()
+            on_commit.call_args[0][0]()
+        schedule.assert_called_once_with(
+            post.image.name, ['index', f'profile:{self.user.pk}']
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, post.image.url)
+
 
 class CommentFormTests(TestCase):
     @classmethod
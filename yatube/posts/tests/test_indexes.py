@@ -0,0 +1,126 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+@override_settings(FOLLOW_FEED_MODE='join')
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.user = User.objects.create_user(username='Test User')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый текст',
+            group=cls.group,
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def query_plans(self, url, table):
+        """Планы всех SELECT из ``table``, выполненных при запросе к url."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        plans = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'COUNT(' in sql:
+                continue
+            if f'FROM "{table}"' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def assertUsesIndex(self, url, table, index_name):
+        plans = self.query_plans(url, table)
+        self.assertTrue(plans, f'{url} не запрашивает {table}')
+        self.assertTrue(
+            any(index_name in plan for plan in plans),
+            f'{url} не использует {index_name}: {plans}'
+        )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент используют составные индексы."""
+        cases = (
+            (reverse('posts:index'), 'posts_post', 'post_pub_date_idx'),
+            (
+                reverse('posts:index') + '?cursor=',
+                'posts_post',
+                'post_pub_date_idx',
+            ),
+            (
+                reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+                'posts_post',
+                'post_group_pub_date_idx',
+            ),
+            (
+                reverse('posts:profile', kwargs={'username': self.author}),
+                'posts_post',
+                'post_author_pub_date_idx',
+            ),
+            (
+                reverse('posts:follow_index'),
+                'posts_post',
+                'post_author_pub_date_idx',
+            ),
+            (
+                reverse('posts:follow_index'),
+                'posts_post',
+                'sqlite_autoindex_posts_follow_1',
+            ),
+            (
+                reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+                'posts_comment',
+                'comment_post_created_idx',
+            ),
+        )
+        for url, table, index_name in cases:
+            with self.subTest(url=url, index_name=index_name):
+                self.assertUsesIndex(url, table, index_name)
+
+    def test_followers_lookup_uses_index(self):
+        """Поиск подписчиков автора идёт по индексу (author, user)."""
+        plan = self.author.following.all().explain()
+        self.assertIn('follow_author_user_idx', plan)
+
+    @override_settings(FOLLOW_FEED_MODE='materialized')
+    def test_materialized_follow_feed_uses_timeline_index(self):
+        """Материализованную ленту отдаёт индекс без сортировки в памяти."""
+        timeline.rebuild()
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + '?cursor=',
+        ):
+            with self.subTest(url=url):
+                plans = self.query_plans(url, 'posts_post')
+                page_plans = [
+                    plan for plan in plans
+                    if 'timeline_user_pub_date_idx' in plan
+                ]
+                self.assertTrue(page_plans, plans)
+                for plan in page_plans:
+                    self.assertNotIn('TEMP B-TREE', plan)
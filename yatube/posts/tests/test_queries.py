@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FIXTURE_SIZES = (10, 100, 1000)
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов к БД не зависит от количества постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description='Тестовое описание',
+            )
+            for i in range(2)
+        ]
+        cls.user = User.objects.create_user(username='Test User')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.post = Post.objects.create(
+            author=cls.authors[0], text='Пост', group=cls.groups[0]
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def grow_to(self, size):
+        posts_count = Post.objects.count()
+        Post.objects.bulk_create(
+            Post(
+                author=self.authors[i % len(self.authors)],
+                group=self.groups[0],
+                text=f'Пост {i}',
+            )
+            for i in range(posts_count, size)
+        )
+        commenters = self.authors + [self.user]
+        comments_count = self.post.comments.count()
+        Comment.objects.bulk_create(
+            Comment(
+                post=self.post,
+                author=commenters[i % len(commenters)],
+                text=f'Комментарий {i}',
+            )
+            for i in range(comments_count, size)
+        )
+
+    def assertQueryBudget(self, client, url, budget):
+        for size in FIXTURE_SIZES:
+            self.grow_to(size)
+            cache.clear()
+            with self.subTest(url=url, size=size):
+                with override_settings(PAGINATOR_NUM=size):
+                    with self.assertNumQueries(budget):
+                        response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_index_query_budget(self):
+        """Главная: количество и срез страницы."""
+        self.assertQueryBudget(self.client, reverse('posts:index'), 2)
+
+    def test_index_cursor_query_budget(self):
+        """Главная с курсором: один запрос без COUNT."""
+        self.assertQueryBudget(
+            self.client, reverse('posts:index') + '?cursor=', 1
+        )
+
+    def test_group_list_query_budget(self):
+        """Группа: группа, количество и срез."""
+        url = reverse('posts:group_list', kwargs={'slug': self.groups[0].slug})
+        self.assertQueryBudget(self.client, url, 3)
+
+    def test_profile_query_budget(self):
+        """Профиль: автор со статистикой и срез, количество из статистики."""
+        url = reverse('posts:profile', kwargs={'username': self.authors[0]})
+        self.assertQueryBudget(self.client, url, 2)
+
+    def test_follow_index_query_budget(self):
+        """Подписки: сессия, пользователь, количество и срез."""
+        self.assertQueryBudget(
+            self.authorized_client, reverse('posts:follow_index'), 4
+        )
+
+    def test_post_detail_query_budget(self):
+        """Пост: пост с автором и его статистикой, комментарии."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertQueryBudget(self.client, url, 2)
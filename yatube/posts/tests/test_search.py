@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.best = Post.objects.create(
+            author=cls.user, text='Котики, котики и ещё раз котики'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Про котики и <script>собак</script>'
+        )
+        Post.objects.create(author=cls.user, text='Совсем о другом')
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def test_ranked_results_with_snippet(self):
+        """Выдача отсортирована по bm25, совпадения подсвечены."""
+        response = self.search('котики')
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), [self.best, self.other])
+        self.assertIn('<mark>котики</mark>', page_obj[0].snippet)
+        self.assertContains(response, '&lt;script&gt;')
+        self.assertNotContains(response, '<script>собак')
+
+    def test_prefix_and_case(self):
+        """Последнее слово ищется по префиксу и без учёта регистра."""
+        response = self.search('СОБ')
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+
+    def test_index_follows_changes(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        self.other.text = 'Теперь про хомяков'
+        self.other.save()
+        self.assertEqual(list(self.search('котики').context['page_obj']), [
+            self.best
+        ])
+        self.assertEqual(list(self.search('хомяков').context['page_obj']), [
+            self.other
+        ])
+        Post.objects.filter(pk=self.best.pk).update(text='Пусто')
+        self.assertFalse(self.search('котики').context['page_obj'])
+
+    def test_empty_query(self):
+        """Запрос без слов не ломает поиск."""
+        for query in ('', '"*()'):
+            with self.subTest(query=query):
+                response = self.search(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.context['page_obj'])
+
+    @override_settings(PAGINATOR_NUM=1)
+    def test_cursor_pagination(self):
+        """Курсор переходит по страницам вперёд и назад, сохраняя q."""
+        first = self.search('котики')
+        page_obj = first.context['page_obj']
+        self.assertEqual(list(page_obj), [self.best])
+        self.assertContains(first, 'q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA%D0%B8')
+        second = self.search('котики', cursor=page_obj.next_cursor)
+        page_obj = second.context['page_obj']
+        self.assertEqual(list(page_obj), [self.other])
+        self.assertFalse(page_obj.has_next())
+        back = self.search('котики', cursor=page_obj.previous_cursor)
+        self.assertEqual(list(back.context['page_obj']), [self.best])
+        broken = self.search('котики', cursor='broken')
+        self.assertEqual(list(broken.context['page_obj']), [self.best])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт через полнотекстовый индекс."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собак'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.other]
+        )
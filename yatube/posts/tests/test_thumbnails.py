@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Post
+from posts.thumbnails import (
+    POST_THUMBNAIL_GEOMETRY, POST_THUMBNAIL_OPTIONS, generate_thumbnail,
+    get_ready_thumbnail,
+)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+# sorl-thumbnail 12.7 масштабирует через Image.ANTIALIAS, которого нет
+# в Pillow 10+; в requirements.txt закреплён совместимый Pillow.
+SORL_CAN_RESIZE = hasattr(Image, 'ANTIALIAS')
+
+
+@skipUnless(SORL_CAN_RESIZE, 'sorl-thumbnail не работает с этим Pillow')
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Каталог создаётся здесь, чтобы пропуск класса не оставлял его.
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='auth'),
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def test_ready_after_generate(self):
+        """get_ready_thumbnail находит миниатюру, созданную в фоне."""
+        self.assertIsNone(get_ready_thumbnail(self.post.image))
+        self.assertTrue(generate_thumbnail(self.post.image.name))
+        thumbnail = get_ready_thumbnail(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        expected = get_thumbnail(
+            self.post.image, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+        )
+        self.assertEqual(thumbnail.name, expected.name)
+        self.assertTrue(thumbnail.exists())
@@ -1,12 +1,27 @@
+import time
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.management import call_command
+from django.db import connection
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
 
-from posts.models import Group, Post, Follow
+from posts.cache import FEED_VERSION_KEY, get_cache, get_feed_version
+from posts.models import Comment, Group, Post, Follow, TimelineEntry
+from posts.paginators import encode_cursor
+from posts.templatetags.pagination import page_window
 
 User = get_user_model()
 
@@ -224,6 +239,131 @@ class PaginatorViewsTest(TestCase):
                     )
 
 
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        for i in range(3):
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [
+            query['sql'] for query in queries if 'COUNT(' in query['sql']
+        ]
+
+    @override_settings(PAGINATOR_NUM=2)
+    def test_count_cached_until_feed_changes(self):
+        """COUNT ленты считается заново только после изменения ленты."""
+        url = reverse('posts:index')
+        self.assertEqual(len(self.count_queries(url)), 1)
+        self.assertEqual(self.count_queries(url + '?page=2'), [])
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(len(self.count_queries(url)), 1)
+        response = self.client.get(url + '?page=2')
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+
+    @override_settings(PAGINATOR_NUM=2)
+    def test_profile_count_from_stats(self):
+        """Профиль берёт количество из статистики и не теряет посты."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.assertEqual(self.count_queries(url), [])
+        Post.objects.bulk_create([Post(author=self.author, text='Импорт')])
+        response = self.client.get(url + '?page=2')
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_page_window(self):
+        """Ссылки только на соседние, первую и последнюю страницы."""
+        paginator = Paginator(range(100), 5)
+        cases = {
+            1: [1, 2, 3, None, 20],
+            4: [1, 2, 3, 4, 5, 6, None, 20],
+            10: [1, None, 8, 9, 10, 11, 12, None, 20],
+            20: [1, None, 18, 19, 20],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    page_window(paginator.page(number)), expected
+                )
+        self.assertEqual(page_window(Paginator(range(9), 5).page(1)), [1, 2])
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'TestText {i}', group=cls.group)
+            for i in range(13)
+        )
+        cls.page_names = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+        )
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсор проходит ленту без пропусков и повторов."""
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        for page_name in self.page_names:
+            with self.subTest(page_name=page_name):
+                first = self.client.get(page_name + '?cursor=')
+                page_obj = first.context['page_obj']
+                self.assertEqual(len(page_obj), settings.PAGINATOR_NUM)
+                self.assertFalse(page_obj.has_previous())
+                second = self.client.get(
+                    page_name, {'cursor': page_obj.next_cursor}
+                )
+                next_page = second.context['page_obj']
+                self.assertFalse(next_page.has_next())
+                self.assertEqual(
+                    list(page_obj) + list(next_page), expected
+                )
+                back = self.client.get(
+                    page_name, {'cursor': next_page.previous_cursor}
+                )
+                self.assertEqual(
+                    list(back.context['page_obj']), list(page_obj)
+                )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу."""
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-pub_date', '-id')[:10]),
+        )
+
+    def test_cursor_with_wrong_key_types(self):
+        """Курсор с числом или списком вместо даты отдаёт первую страницу."""
+        post = Post.objects.latest('pub_date')
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:api_index'),
+            reverse('posts:post_comments', kwargs={'post_id': post.pk}),
+        )
+        for key in ([123, 1], [[1], 1], [{'d': 1}, 1]):
+            cursor = encode_cursor({'d': 'next', 'k': key})
+            for url in urls:
+                with self.subTest(url=url, key=key):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+
+
 class CachTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -247,6 +387,449 @@ class CachTest(TestCase):
         self.assertNotEqual(new_post, response.context['page_obj'][-1])
 
 
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test User')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(settings.PAGINATOR_NUM + 1):
+            cls.last_post = Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый текст {i}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_cached_separately(self):
+        """Вторая страница не отдаётся из кеша первой."""
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertContains(first, self.last_post.text)
+        self.assertNotContains(second, self.last_post.text)
+        self.assertContains(second, 'Тестовый текст 0')
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден в лентах, закешированных ранее."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.client.get(url)
+        new_post = Post.objects.create(
+            author=self.user,
+            text='Свежий пост',
+            group=self.group,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), new_post.text)
+
+    def test_equal_versions_do_not_share_fragments(self):
+        """Ленты с одинаковыми счётчиками версий кешируются раздельно."""
+        other = User.objects.create_user(username='other')
+        reader = User.objects.create_user(username='reader')
+        lonely = User.objects.create_user(username='lonely')
+        other_group = Group.objects.create(
+            title='Другая', slug='other-slug', description='Описание'
+        )
+        Post.objects.create(author=other, text='Чужой пост', group=other_group)
+        Follow.objects.create(user=reader, author=other)
+        get_cache().set_many({
+            FEED_VERSION_KEY.format(scope): 1 for scope in (
+                'all', 'index',
+                f'group:{self.group.pk}', f'group:{other_group.pk}',
+                f'profile:{self.user.pk}', f'profile:{other.pk}',
+                f'follow:{reader.pk}', f'follow:{lonely.pk}',
+            )
+        }, None)
+        pairs = (
+            (
+                reverse('posts:group_list', args=[self.group.slug]),
+                reverse('posts:group_list', args=[other_group.slug]),
+            ),
+            (
+                reverse('posts:profile', args=[self.user.username]),
+                reverse('posts:profile', args=[other.username]),
+            ),
+        )
+        for first, second in pairs:
+            with self.subTest(url=second):
+                self.assertNotContains(self.client.get(first), 'Чужой пост')
+                self.assertContains(self.client.get(second), 'Чужой пост')
+        reader_client = Client()
+        reader_client.force_login(reader)
+        lonely_client = Client()
+        lonely_client.force_login(lonely)
+        url = reverse('posts:follow_index')
+        self.assertContains(reader_client.get(url), 'Чужой пост')
+        self.assertNotContains(lonely_client.get(url), 'Чужой пост')
+
+    def test_versions_expire_without_shared_cache(self):
+        """С кешем в памяти процесса версии лент живут недолго."""
+        url = reverse('posts:index')
+        later = time.time() + settings.FEED_CACHE_TIMEOUT + 1
+        for timeout, changes in ((None, False), (20, True)):
+            with self.subTest(timeout=timeout):
+                cache.clear()
+                with override_settings(FEED_VERSION_TIMEOUT=timeout):
+                    etag = self.client.get(url)['ETag']
+                    with mock.patch('time.time', return_value=later):
+                        response = self.client.get(
+                            url, HTTP_IF_NONE_MATCH=etag
+                        )
+                self.assertEqual(response.status_code != 304, changes)
+
+    def test_post_edit_and_group_change_invalidate_feeds(self):
+        """Правка поста и переименование группы сбрасывают кеш."""
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        other_url = reverse(
+            'posts:group_list', kwargs={'slug': other_group.slug}
+        )
+        self.client.get(reverse('posts:index'))
+        self.client.get(other_url)
+        post = Post.objects.get(pk=self.last_post.pk)
+        post.text = 'Исправленный текст'
+        post.group = other_group
+        post.save()
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Исправленный текст'
+        )
+        self.assertContains(self.client.get(other_url), 'Исправленный текст')
+        self.assertNotContains(
+            self.client.get(
+                reverse('posts:group_list', kwargs={'slug': self.group.slug})
+            ),
+            'Исправленный текст'
+        )
+        other_group.slug = 'renamed-slug'
+        other_group.save()
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'group/renamed-slug/'
+        )
+
+
+class ConditionalFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test User')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_feeds_are_public(self):
+        """Анонимам ленты отдаются с публичным Cache-Control."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn(
+                    f'max-age={settings.FEED_HTTP_MAX_AGE}',
+                    response['Cache-Control'],
+                )
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_unchanged_feed_not_modified(self):
+        """Повторный запрос с ETag или датой получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                cached = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(cached.status_code, 304)
+                cached = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(cached.status_code, 304)
+
+    def test_index_not_modified_without_queries(self):
+        response = self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                reverse('posts:index'), HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_changes_and_pages_change_etag(self):
+        """Новый пост, другая страница и вход меняют ETag."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.assertNotEqual(
+            self.client.get(self.urls[0] + '?page=2')['ETag'],
+            etags[self.urls[0]],
+        )
+        Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                etags[url] = response['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(
+            self.urls[0], HTTP_IF_NONE_MATCH=etags[self.urls[0]]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag профиля для подписчика."""
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        url = self.urls[2]
+        etag = self.client.get(url)['ETag']
+        Follow.objects.create(user=reader, author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+
+class PostDetailConditionalTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый текст')
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def test_last_modified_from_updated_at(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['Last-Modified'],
+            http_date(self.post.updated_at.timestamp()),
+        )
+        cached = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_edit_and_comment_change_etag(self):
+        """Правка поста и новый комментарий отдают страницу заново."""
+        etag = self.client.get(self.url)['ETag']
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Исправленный текст')
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertContains(response, 'Комментарий')
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый текст')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}'
+            )
+            for i in range(5)
+        ]
+        cls.url = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def test_post_detail_shows_first_page(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:2])
+        self.assertContains(response, 'Комментарии: 5')
+        self.assertContains(response, comments.next_cursor)
+
+    def test_fragment_pages(self):
+        """Фрагменты комментариев идут по курсору до конца."""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html'
+            )
+            page = response.context['comments']
+            seen.extend(page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.comments)
+
+    def test_json_pages(self):
+        first = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(
+            [comment['text'] for comment in first['results']],
+            ['Комментарий 0', 'Комментарий 1'],
+        )
+        second = self.client.get(
+            self.url, {'format': 'json', 'cursor': first['next']}
+        ).json()
+        self.assertEqual(second['results'][0]['id'], self.comments[2].pk)
+
+    def test_missing_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def assert_detail_modified(self, change):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        later = datetime.fromtimestamp(
+            parse_http_date(response['Last-Modified']) + 3600, timezone.utc
+        )
+        with mock.patch('django.utils.timezone.now', return_value=later), \
+                mock.patch('time.time', return_value=later.timestamp()):
+            change()
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_modified_by_changes_off_page(self):
+        """Last-Modified поста меняется от всего, что видно на странице."""
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+
+        def rename_group():
+            group.title = 'Новое название'
+            group.save()
+
+        def rename_author():
+            self.user.first_name = 'Лев'
+            self.user.save()
+
+        changes = {
+            'new comment': lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Ещё один'
+            ),
+            'deleted comment': lambda: Comment.objects.filter(
+                pk=self.comments[-1].pk
+            ).get().delete(),
+            'group rename': rename_group,
+            'author rename': rename_author,
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                self.assert_detail_modified(change)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def render_index(self):
+        with mock.patch(
+            'posts.templatetags.post_cards.render_to_string',
+            wraps=render_to_string,
+        ) as render:
+            response = self.client.get(reverse('posts:index'))
+        return response, render.call_count
+
+    def test_cards_reused_after_feed_change(self):
+        """После нового поста рендерится только его карточка."""
+        self.render_index()
+        Post.objects.create(author=self.user, text='Новый пост')
+        response, rendered = self.render_index()
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Тестовый текст')
+        self.assertContains(response, 'Новый пост')
+
+    def test_edit_and_author_change_refresh_card(self):
+        """Правка поста и смена имени автора видны сразу."""
+        self.render_index()
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertContains(self.render_index()[0], 'Исправленный текст')
+        self.user.first_name = 'Фёдор'
+        self.user.last_name = 'Достоевский'
+        self.user.save()
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.render_index()[0]
+        self.assertContains(response, 'Фёдор Достоевский')
+        self.assertNotContains(response, 'Лев Толстой')
+
+    def test_profile_cards_without_author(self):
+        """В профиле карточки отдельные и без блока автора."""
+        self.render_index()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertNotContains(response, 'все посты пользователя')
+
+    def test_author_rename_refreshes_feeds(self):
+        """Смена имени автора сбрасывает ленты и их ETag."""
+        response = self.render_index()[0]
+        self.user.first_name = 'Фёдор'
+        self.user.last_name = 'Достоевский'
+        self.user.save()
+        response = self.client.get(
+            reverse('posts:index'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertContains(response, 'Фёдор Достоевский')
+        self.assertNotContains(response, 'Лев Толстой')
+
+    def test_login_keeps_feed_version(self):
+        version = get_feed_version()
+        self.client.force_login(self.user)
+        self.assertEqual(get_feed_version(), version)
+
+    def test_card_without_thumbnail_not_cached(self):
+        """Карточку с ещё не готовой миниатюрой не кешируем."""
+        Post.objects.filter(pk=self.post.pk).update(image='posts/none.gif')
+        self.render_index()
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.render_index()[1], 2)
+
+
 class FollowTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -317,3 +900,125 @@ class FollowTest(TestCase):
         self.assertRedirects(response, reverse(
             'posts:profile', kwargs={'username': self.author})
         )
+
+
+class FollowingIdsCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Test Author')
+        cls.user = User.objects.create_user(username='Test User')
+        cls.url = reverse('posts:profile', kwargs={'username': cls.author})
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_profile_reads_following_from_cache(self):
+        """Повторный профиль не спрашивает подписки у базы."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertFalse(response.context['following'])
+        self.assertFalse(any(
+            'posts_follow' in query['sql'] for query in queries
+        ))
+
+    def test_follow_and_unfollow_refresh_cache(self):
+        self.client.get(self.url)
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['following'])
+        self.assertIn(self.author.pk, response.context['following_ids'])
+        self.assertContains(response, 'Отписаться')
+        self.client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['following'])
+        self.assertContains(response, 'Подписаться')
+
+    def test_anonymous_has_empty_set(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertNotIn(self.author.pk, response.context['following_ids'])
+
+
+@override_settings(FOLLOW_FEED_MODE='materialized')
+class MaterializedFollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Test Author')
+        cls.other_author = User.objects.create_user(username='Other Author')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+        cls.user = User.objects.create_user(username='Test User')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка добавляет старые посты автора, отписка убирает их."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.other_author, text='Чужой пост')
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_rebuild_timelines_command(self):
+        """rebuild_timelines заполняет ленты по существующим подпискам."""
+        with override_settings(FOLLOW_FEED_MODE='join'):
+            Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.feed(), [])
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @override_settings(PAGINATOR_NUM=2)
+    def test_cursor_walks_timeline(self):
+        """Курсор проходит материализованную ленту в HTML и JSON."""
+        Follow.objects.create(user=self.user, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        expected = [post.pk for post in reversed(posts)] + [self.old_post.pk]
+        url = reverse('posts:follow_index')
+        first = self.authorized_client.get(url + '?cursor=')
+        page_obj = first.context['page_obj']
+        second = self.authorized_client.get(
+            url, {'cursor': page_obj.next_cursor}
+        )
+        self.assertEqual(
+            [post.pk for post in page_obj]
+            + [post.pk for post in second.context['page_obj']],
+            expected,
+        )
+        api_url = reverse('posts:api_follow_index')
+        first = self.authorized_client.get(api_url).json()
+        second = self.authorized_client.get(
+            api_url, {'cursor': first['next']}
+        ).json()
+        self.assertEqual(
+            [post['id'] for post in first['results'] + second['results']],
+            expected,
+        )
+        self.assertIsNone(second['next'])
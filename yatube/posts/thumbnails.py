@@ -0,0 +1,75 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from .cache import bump_feed_version
+
+logger = logging.getLogger(__name__)
+
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+
+
+def _thumbnail_options(source):
+    # Те же умолчания, что подставляет ThumbnailBackend.get_thumbnail,
+    # иначе имя миниатюры не совпадёт с тем, что создаётся в фоне.
+    backend = default.backend
+    options = dict(POST_THUMBNAIL_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def get_ready_thumbnail(image):
+    """Готовая миниатюра картинки поста или None, если её ещё нет."""
+    if not image:
+        return None
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, POST_THUMBNAIL_GEOMETRY, _thumbnail_options(source)
+    )
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def generate_thumbnail(name):
+    """Создаёт миниатюру для файла картинки поста, если её ещё нет."""
+    try:
+        get_thumbnail(name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру для %s', name)
+        return False
+    return True
+
+
+def _generate_in_thread(name, feed_scopes):
+    try:
+        if generate_thumbnail(name):
+            # Ленты могли закешировать оригинал вместо миниатюры.
+            bump_feed_version(*feed_scopes)
+    finally:
+        connections.close_all()
+
+
+def schedule_thumbnail(name, feed_scopes=()):
+    """Отправляет создание миниатюры в фоновый пул потоков."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor.submit(_generate_in_thread, name, feed_scopes)
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .cache import ALL_FEEDS, bump_feed_version
+from .models import Follow, Post, TimelineEntry
+
+MATERIALIZED = 'materialized'
+
+
+def is_materialized():
+    return settings.FOLLOW_FEED_MODE == MATERIALIZED
+
+
+def follow_feed(user):
+    """Посты авторов, на которых подписан ``user``.
+
+    Материализованная лента сортируется по столбцам TimelineEntry, чтобы
+    страницу отдавал индекс (user, -pub_date, -post) без сортировки.
+    """
+    if is_materialized():
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        ).order_by('-feed_date', '-feed_post')
+    return Post.objects.filter(author__following__user=user)
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=settings.TIMELINE_BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post.pk, pub_date=post.pub_date
+        ))
+        if len(batch) == settings.TIMELINE_BATCH_SIZE:
+            _insert(batch)
+            batch = []
+    _insert(batch)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_SIZE]
+    _insert([
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts
+    ])
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты подписчика посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild():
+    """Заполняет ленты заново по текущим подпискам."""
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            backfill(user_id, author_id)
+    bump_feed_version(ALL_FEEDS)
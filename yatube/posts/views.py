@@ -1,71 +1,165 @@
+from datetime import datetime
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
 
+from core.loaders import load
+from .api import COMMENT_FIELDS, serialize_comment
+from .cache import (
+    feed_cache, feed_freshness, get_feed_modified, get_following_ids,
+    page_freshness,
+)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Follow
+from .models import AuthorStats, Comment, Group, Post, Follow
+from .paginators import paginate, paginate_comments
+from .search import search_page
+from .timeline import follow_feed
 
 User = get_user_model()
 
 
+def cache_headers(request, response, freshness):
+    response['ETag'] = quote_etag(freshness['etag'])
+    response['Last-Modified'] = http_date(freshness['last_modified'])
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.FEED_HTTP_MAX_AGE
+        )
+    return response
+
+
+def not_modified_response(request, freshness):
+    """Ответ 304, если у клиента актуальная версия страницы, иначе None."""
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(freshness['etag']),
+        last_modified=freshness['last_modified'],
+    )
+    if response is not None:
+        return cache_headers(request, response, freshness)
+    return None
+
+
+def fetch_page(page_obj):
+    """Выбирает посты страницы сразу, а не при рендеринге шаблона."""
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
 def index(request):
+    freshness = feed_freshness(request, 'index')
+    not_modified = not_modified_response(request, freshness)
+    if not_modified:
+        return not_modified
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, settings.PAGINATOR_NUM)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginate(request, post_list, scopes=('index',))
     context = {
         'page_obj': page_obj,
         'index': True,
+        'feed_cache': feed_cache('index'),
     }
-    return render(request, template, context)
+    return cache_headers(
+        request, render(request, template, context), freshness
+    )
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
+    freshness = feed_freshness(request, f'group:{group.pk}')
+    not_modified = not_modified_response(request, freshness)
+    if not_modified:
+        return not_modified
     template = 'posts/group_list.html'
     page_title = f'Записи сообщества: {group.title}'
-    group_list = Post.objects.filter(group=group)
-    paginator = Paginator(group_list, settings.PAGINATOR_NUM)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group_list = group.posts.select_related('author')
+    page_obj = paginate(request, group_list, scopes=(f'group:{group.pk}',))
     context = {
         'page_obj': page_obj,
         'group': group,
         'page_title': page_title,
+        'feed_cache': feed_cache(f'group:{group.pk}'),
     }
-    return render(request, template, context)
+    return cache_headers(
+        request, render(request, template, context), freshness
+    )
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_list = Post.objects.filter(author=author)
-    paginator = Paginator(author_list, settings.PAGINATOR_NUM)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    total_author_posts = author_list.count()
-    user = request.user
-    following = user.is_authenticated and author.following.filter(
-        user=user
-    ).exists()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    freshness = feed_freshness(request, f'profile:{author.pk}')
+    not_modified = not_modified_response(request, freshness)
+    if not_modified:
+        return not_modified
+    author_list = author.posts.select_related('group')
+    total_author_posts = AuthorStats.objects.for_author(author).posts_count
+    loaded = load(
+        page_obj=lambda: fetch_page(
+            paginate(request, author_list, count=total_author_posts)
+        ),
+        following_ids=lambda: get_following_ids(request.user),
+    )
+    page_obj = loaded['page_obj']
+    following = author.pk in loaded['following_ids']
     context = {
         'page_obj': page_obj,
         'author': author,
         'total_author_posts': total_author_posts,
         'following': following,
+        'feed_cache': feed_cache(f'profile:{author.pk}'),
     }
-    return render(request, 'posts/profile.html', context)
+    return cache_headers(
+        request, render(request, 'posts/profile.html', context), freshness
+    )
 
 
 def post_detail(request, post_id):
-    author_post = get_object_or_404(Post, id=post_id)
+    loaded = load(
+        author_post=lambda: get_object_or_404(
+            Post.objects.select_related('author__stats', 'group'), id=post_id
+        ),
+        comments=lambda: paginate_comments(
+            Comment.objects.filter(post_id=post_id).select_related('author')
+        ),
+    )
+    author_post = loaded['author_post']
+    comments = loaded['comments']
     author = author_post.author
-    author_list = Post.objects.filter(author=author)
-    total_author_posts = author_list.count()
+    total_author_posts = AuthorStats.objects.for_author(author).posts_count
     form = CommentForm()
-    comments = author_post.comments.all()
+    # Комментарии вне первой страницы меняют updated_at поста, а имя
+    # автора и число его постов — отметку изменения его профиля.
+    profile_modified = datetime.fromtimestamp(
+        get_feed_modified(f'profile:{author.pk}'), timezone.utc
+    )
+    modified = [author_post.updated_at, profile_modified]
+    if author_post.group_id:
+        modified.append(author_post.group.updated_at)
+    modified.extend(comment.updated_at for comment in comments)
+    last_modified = max(modified)
+    freshness = page_freshness(
+        request,
+        last_modified,
+        author_post.comments_count,
+        total_author_posts,
+    )
+    not_modified = not_modified_response(request, freshness)
+    if not_modified:
+        return not_modified
     context = {
         'post_id': post_id,
         'author_post': author_post,
@@ -74,7 +168,42 @@ def post_detail(request, post_id):
         'form': form,
         'comments': comments,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return cache_headers(
+        request, render(request, 'posts/post_detail.html', context), freshness
+    )
+
+
+def post_comments(request, post_id):
+    """Следующая страница комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    cursor = request.GET.get('cursor')
+    if request.GET.get('format') == 'json':
+        page = paginate_comments(
+            post.comments.values(*COMMENT_FIELDS), cursor
+        )
+        return JsonResponse({
+            'results': [serialize_comment(row) for row in page],
+            'next': page.next_cursor,
+        })
+    page = paginate_comments(post.comments.select_related('author'), cursor)
+    context = {
+        'post_id': post_id,
+        'comments': page,
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = search_page(
+        query, settings.PAGINATOR_NUM, request.GET.get('cursor')
+    )
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'query_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
@@ -123,15 +252,22 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.PAGINATOR_NUM)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    freshness = feed_freshness(request, 'index')
+    not_modified = not_modified_response(request, freshness)
+    if not_modified:
+        return not_modified
+    post_list = follow_feed(request.user).select_related('author', 'group')
+    page_obj = paginate(
+        request, post_list, scopes=('index', f'follow:{request.user.pk}')
+    )
     context = {
         'page_obj': page_obj,
         'follow': True,
+        'feed_cache': feed_cache('index', f'follow:{request.user.pk}'),
     }
-    return render(request, 'posts/follow.html', context)
+    return cache_headers(
+        request, render(request, 'posts/follow.html', context), freshness
+    )
 
 
 @login_required
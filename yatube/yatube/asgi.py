@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 has no ASGI handler or async views, so the WSGI application is
+served through an asgiref WsgiToAsgi adapter that runs every request in
+the event loop's thread pool: a slow request no longer holds one of a
+fixed number of worker processes. Run it with any ASGI server, e.g.
+``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ThreadedWsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ThreadedWsgiToAsgi(get_wsgi_application())